@@ -4,42 +4,728 @@ IETF Author Tools API Client
 
 Renders kramdown-rfc markdown files to XML, TXT, HTML, and PDF formats
 using the IETF Author Tools API.
+
+Requires requests and python-dotenv (pip install requests python-dotenv).
+The asyncio client in at_async.py also requires aiohttp
+(pip install aiohttp).
 """
 
+from __future__ import annotations
+
 import argparse
+import glob
+import hashlib
+import json
 import os
+import random
+import re
+import shutil
+import socket
+import socketserver
+import stat
+import subprocess
 import sys
+import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable
 from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+# Third-party modules, imported on first use by _import_dependencies()
+requests = None
+dotenv = None
+
+
+def _import_dependencies() -> None:
+    """Import the third-party dependencies.
+
+    They are deferred so that --help, argument errors and commands
+    forwarded to a running daemon never pay for importing them.
+    """
+    global requests, dotenv
+    if requests is not None:
+        return
+
+    try:
+        import requests
+    except ImportError:
+        print("Error: requests library not found. Install with: pip install requests")
+        sys.exit(1)
+
+    try:
+        import dotenv
+    except ImportError:
+        print("Error: python-dotenv library not found. Install with: pip install python-dotenv")
+        sys.exit(1)
+
+
+class RenderCache:
+    """Content-addressed on-disk cache of API responses and artifacts.
+
+    Entries are keyed by a hash of the input bytes, the endpoint URL and
+    the query parameters. Each entry is a directory holding the JSON
+    response and, for render endpoints, the downloaded artifact. Entries
+    are evicted least-recently-used first once the cache exceeds its size
+    limit, and unconditionally once older than the age limit.
+    """
+
+    RESPONSE_NAME = 'response.json'
+    ARTIFACT_NAME = 'artifact'
+
+    def __init__(self, root: Path, max_size: int = 256 * 1024 * 1024,
+                 max_age: float = 30 * 24 * 3600):
+        """Initialize the cache.
+
+        Args:
+            root: Cache directory
+            max_size: Maximum total size in bytes
+            max_age: Maximum entry age in seconds since last use
+        """
+        self.root = root
+        self.max_size = max_size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Artifact URL -> cache entry, for responses seen in this process
+        self._artifacts: Dict[str, Path] = {}
+
+    @staticmethod
+    def default_dir() -> Path:
+        """Return the default cache directory."""
+        base = os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache'
+        return Path(base) / 'ietf-author-tools'
+
+    def key(self, file_path: Path, url: str,
+            params: Optional[Dict[str, Any]] = None) -> str:
+        """Compute the cache key for a request.
+
+        Args:
+            file_path: Path to the file to upload
+            url: Endpoint URL
+            params: Optional query parameters
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        digest.update(b'\0' + url.encode())
+        for name, value in sorted((params or {}).items()):
+            digest.update(f"\0{name}={value}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str, require_artifact: bool = False) -> Optional[Dict[str, Any]]:
+        """Look up a cached response.
+
+        Args:
+            key: Cache key from key()
+            require_artifact: Treat entries without an artifact as misses
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        entry = self.root / key
+        try:
+            with open(entry / self.RESPONSE_NAME, 'r', encoding='utf-8') as f:
+                response = json.load(f)
+            if time.time() - entry.stat().st_mtime > self.max_age:
+                raise FileNotFoundError(entry)
+            if require_artifact and not (entry / self.ARTIFACT_NAME).exists():
+                raise FileNotFoundError(entry / self.ARTIFACT_NAME)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Touch the entry so eviction treats it as recently used
+        os.utime(entry)
+        self.hits += 1
+        if 'url' in response:
+            self._artifacts[response['url']] = entry
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response.
+
+        Args:
+            key: Cache key from key()
+            response: API response to store
+        """
+        entry = self.root / key
+        entry.mkdir(parents=True, exist_ok=True)
+        tmp_path = entry / f"{self.RESPONSE_NAME}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(response, f)
+        os.replace(tmp_path, entry / self.RESPONSE_NAME)
+        if 'url' in response:
+            self._artifacts[response['url']] = entry
+        self.prune()
+
+    def artifact(self, url: str) -> Optional[Path]:
+        """Return the cached artifact for a response URL, if present."""
+        entry = self._artifacts.get(url)
+        if entry is None:
+            return None
+        artifact_path = entry / self.ARTIFACT_NAME
+        return artifact_path if artifact_path.exists() else None
+
+    def put_artifact(self, url: str, source_path: Path) -> None:
+        """Store the artifact downloaded from a response URL.
+
+        Args:
+            url: URL the artifact was downloaded from
+            source_path: Downloaded file to copy into the cache
+        """
+        entry = self._artifacts.get(url)
+        if entry is None or not entry.exists():
+            return
+        tmp_path = entry / f"{self.ARTIFACT_NAME}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, entry / self.ARTIFACT_NAME)
+        self.prune()
+
+    def prune(self) -> None:
+        """Evict expired entries, then least recently used ones over the size limit."""
+        with self._lock:
+            if not self.root.exists():
+                return
+
+            now = time.time()
+            entries = []
+            for entry in self.root.iterdir():
+                try:
+                    mtime = entry.stat().st_mtime
+                    size = sum(p.stat().st_size for p in entry.iterdir())
+                except OSError:
+                    continue
+                if now - mtime > self.max_age:
+                    shutil.rmtree(entry, ignore_errors=True)
+                else:
+                    entries.append((mtime, size, entry))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries):
+                if total <= self.max_size:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+    def clear(self) -> None:
+        """Remove every cache entry, leaving anything else in the directory."""
+        with self._lock:
+            if self.root.is_dir():
+                for entry in self.root.iterdir():
+                    if entry.is_dir() and not entry.is_symlink():
+                        shutil.rmtree(entry, ignore_errors=True)
+            self._artifacts.clear()
+
+
+class Metrics:
+    """Thread-safe collector of per-operation timings and counters.
+
+    Each operation (an API endpoint such as render_pdf, or download) keeps
+    request counts, status codes, bytes sent and received, retries, cache
+    hits, a window of recent latencies for percentiles and the total time
+    spent in each phase (queueing, request, transfer, local writes).
+    """
+
+    # Latency samples kept per operation for percentile estimates
+    MAX_SAMPLES = 10000
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self):
+        self._ops: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float, status: Optional[int] = None,
+               sent: int = 0, received: int = 0, retries: int = 0,
+               cache_hit: bool = False, failed: bool = False,
+               phases: Optional[Dict[str, float]] = None) -> None:
+        """Record one completed operation.
+
+        Args:
+            operation: Operation name
+            seconds: Wall-clock latency
+            status: HTTP status code of the final response, if any
+            sent: Bytes sent
+            received: Bytes received
+            retries: Retries performed
+            cache_hit: Whether the result came from the cache
+            failed: Whether the operation raised before completing
+            phases: Seconds spent per phase
+        """
+        with self._lock:
+            op = self._ops.get(operation)
+            if op is None:
+                op = self._ops[operation] = {
+                    'count': 0, 'failures': 0, 'status_codes': {}, 'bytes_sent': 0,
+                    'bytes_received': 0, 'retries': 0, 'cache_hits': 0, 'seconds': 0.0,
+                    'phases': {}, 'latencies': deque(maxlen=self.MAX_SAMPLES),
+                }
+            op['count'] += 1
+            op['failures'] += int(failed)
+            if status is not None:
+                op['status_codes'][str(status)] = op['status_codes'].get(str(status), 0) + 1
+            op['bytes_sent'] += sent
+            op['bytes_received'] += received
+            op['retries'] += retries
+            op['cache_hits'] += int(cache_hit)
+            for phase, value in (phases or {}).items():
+                op['phases'][phase] = op['phases'].get(phase, 0.0) + value
+            op['seconds'] += seconds
+            op['latencies'].append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return a JSON-serializable snapshot of all operations."""
+        with self._lock:
+            result = {}
+            for name, op in sorted(self._ops.items()):
+                samples = sorted(op['latencies'])
+                latency = {'mean': sum(samples) / len(samples), 'max': samples[-1]}
+                for q in self.QUANTILES:
+                    index = min(len(samples) - 1, int(q * len(samples)))
+                    latency[f"p{int(q * 100)}"] = samples[index]
+                result[name] = {key: value for key, value in op.items()
+                                if key != 'latencies'}
+                result[name]['latency'] = latency
+            return result
+
+    def write_json(self, path: Path) -> None:
+        """Write the summary as JSON."""
+        self._write_atomic(path, json.dumps(self.summary(), indent=2) + '\n')
+
+    def write_prometheus(self, path: Path) -> None:
+        """Write the summary in Prometheus textfile collector format."""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[str]) -> None:
+            lines.append(f"# HELP at_{name} {help_text}")
+            lines.append(f"# TYPE at_{name} {kind}")
+            lines.extend(f"at_{name}{sample}" for sample in samples)
+
+        summary = self.summary()
+        metric('operation_latency_seconds', 'summary', 'Operation latency.',
+               [f'{{operation="{name}",quantile="{q}"}} {op["latency"][f"p{int(q * 100)}"]}'
+                for name, op in summary.items() for q in self.QUANTILES] +
+               [f'_sum{{operation="{name}"}} {op["seconds"]}' for name, op in summary.items()] +
+               [f'_count{{operation="{name}"}} {op["count"]}' for name, op in summary.items()])
+        metric('responses_total', 'counter', 'Responses by status code.',
+               [f'{{operation="{name}",code="{code}"}} {count}'
+                for name, op in summary.items()
+                for code, count in sorted(op['status_codes'].items())])
+        for key, help_text in (('failures', 'Operations that raised before completing.'),
+                               ('bytes_sent', 'Bytes sent.'),
+                               ('bytes_received', 'Bytes received.'),
+                               ('retries', 'Retried requests.'),
+                               ('cache_hits', 'Results served from the cache.')):
+            metric(f"{key}_total", 'counter', help_text,
+                   [f'{{operation="{name}"}} {op[key]}' for name, op in summary.items()])
+        metric('phase_seconds_total', 'counter', 'Time spent per phase.',
+               [f'{{operation="{name}",phase="{phase}"}} {seconds}'
+                for name, op in summary.items()
+                for phase, seconds in sorted(op['phases'].items())])
+
+        self._write_atomic(path, '\n'.join(lines) + '\n')
+
+    @staticmethod
+    def _write_atomic(path: Path, content: str) -> None:
+        # Collectors must never see a half-written file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+class RequestScheduler:
+    """Shared rate limiter and retry policy for API requests.
+
+    Every request first takes a token from a bucket that refills at a fixed
+    rate, so all concurrent workers draw on one global budget. Throttled
+    (429) and transient server errors are retried with exponential backoff
+    and full jitter. A Retry-After header pauses the whole scheduler, not
+    just the request that received it.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, rate: float = 5.0, burst: int = 5, max_retries: int = 5,
+                 backoff: float = 1.0, max_backoff: float = 60.0):
+        """Initialize the scheduler.
+
+        Args:
+            rate: Sustained requests per second
+            burst: Maximum requests sent back to back
+            max_retries: Retries per request before giving up
+            backoff: Base delay in seconds for exponential backoff
+            max_backoff: Upper bound on any single delay
+
+        Raises:
+            ValueError: If rate is not positive or max_retries is negative
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if max_retries < 0:
+            raise ValueError(f"max_retries must not be negative, got {max_retries}")
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def last_retries(self) -> int:
+        """Retries made by this thread's most recent send()."""
+        return getattr(self._local, 'retries', 0)
+
+    @property
+    def last_wait(self) -> float:
+        """Seconds this thread's most recent send() spent rate limited."""
+        return getattr(self._local, 'wait', 0.0)
+
+    def acquire(self) -> float:
+        """Block until the global budget allows another request.
+
+        Returns:
+            Seconds spent waiting
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst,
+                                   self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now < self._resume_at:
+                    wait = self._resume_at - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - start
+                else:
+                    wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def _count_retry(self) -> None:
+        """Count a retry for this thread and in the shared total."""
+        self._local.retries += 1
+        with self._lock:
+            self.retries += 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every request for the given number of seconds."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Compute the delay before the next attempt.
+
+        Args:
+            attempt: Zero-based attempt number that just failed
+            response: Response that triggered the retry, if any
+
+        Returns:
+            Delay in seconds
+        """
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = 0.0
+            return min(max(delay, 0.0), self.max_backoff)
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def send(self, request: Callable[[], requests.Response]) -> requests.Response:
+        """Send a request under the rate limit, retrying transient failures.
+
+        Args:
+            request: Callable that performs the request; it is called once
+                per attempt, so it must reopen any upload it streams
+
+        Returns:
+            The final response, which may still carry an error status
+
+        Raises:
+            requests.RequestException: If the last attempt fails to connect
+        """
+        self._local.retries = 0
+        self._local.wait = 0.0
+        for attempt in range(self.max_retries + 1):
+            self._local.wait += self.acquire()
+            try:
+                response = request()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                self._count_retry()
+                time.sleep(self.retry_delay(attempt))
+                continue
+
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                return response
+
+            delay = self.retry_delay(attempt, response)
+            response.close()
+            self._count_retry()
+            if response.status_code == 429 or 'Retry-After' in response.headers:
+                # The server wants everyone to slow down, not just this request
+                self.pause(delay)
+            else:
+                time.sleep(delay)
 
-try:
-    import requests
-except ImportError:
-    print("Error: requests library not found. Install with: pip install requests")
-    sys.exit(1)
+        return response
 
-try:
-    from dotenv import load_dotenv
-except ImportError:
-    print("Error: python-dotenv library not found. Install with: pip install python-dotenv")
-    sys.exit(1)
+
+def _run_tool(command: List[str], cwd: Path, timeout: float,
+              stdout_path: Optional[Path] = None) -> Dict[str, Any]:
+    """Run one renderer command and collect its diagnostics.
+
+    Args:
+        command: Command line to execute
+        cwd: Working directory, so relative includes resolve
+        timeout: Seconds before the command is killed
+        stdout_path: Optional file to receive standard output
+
+    Returns:
+        Dict with errors, warnings and the command's standard output
+    """
+    result = {'errors': [], 'warnings': [], 'output': ''}
+    try:
+        if stdout_path is not None:
+            with open(stdout_path, 'wb') as out:
+                proc = subprocess.run(command, cwd=cwd, stdout=out,
+                                      stderr=subprocess.PIPE, timeout=timeout)
+        else:
+            proc = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE, timeout=timeout)
+            result['output'] = proc.stdout.decode('utf-8', 'replace')
+    except FileNotFoundError:
+        result['errors'].append(f"{command[0]}: command not found")
+        return result
+    except subprocess.TimeoutExpired:
+        result['errors'].append(f"{command[0]}: timed out after {timeout:g}s")
+        return result
+
+    for line in proc.stderr.decode('utf-8', 'replace').splitlines():
+        if re.search(r'\berror\b', line, re.IGNORECASE):
+            result['errors'].append(line.strip())
+        elif line.strip():
+            result['warnings'].append(line.strip())
+
+    if proc.returncode != 0 and not result['errors']:
+        result['errors'].append(f"{command[0]}: exited with status {proc.returncode}")
+    return result
+
+
+def _local_job(kind: str, file_path: str, work_dir: str, tools: Dict[str, str],
+               timeout: float, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Render or check one document with local tools in a worker process.
+
+    Each job gets its own temp directory under work_dir, which holds the
+    intermediate XML and the final artifact. The directory is removed
+    here unless the response points at an artifact in it; otherwise
+    LocalBackend.release() removes it once the artifact has been read.
+
+    Args:
+        kind: One of LocalBackend.ENDPOINTS' values
+        file_path: Input markdown file
+        work_dir: Directory for per-job temp directories
+        tools: Command names for kramdown-rfc, xml2rfc and idnits
+        timeout: Seconds allowed for each command
+        params: Endpoint query parameters
+
+    Returns:
+        Response dict with url, errors and warnings, like the remote API
+    """
+    source = Path(file_path).resolve()
+    job_dir = Path(tempfile.mkdtemp(prefix=f"{kind}-", dir=work_dir))
+    try:
+        response = _run_local_job(kind, source, job_dir, tools, timeout, params)
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    if 'url' not in response:
+        shutil.rmtree(job_dir, ignore_errors=True)
+    return response
+
+
+def _run_local_job(kind: str, source: Path, job_dir: Path, tools: Dict[str, str],
+                   timeout: float, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the commands for one local job inside its temp directory."""
+    xml_path = job_dir / f"{source.stem}.xml"
+
+    if source.suffix == '.xml':
+        # Already converted, e.g. by a render-once pipeline
+        shutil.copyfile(source, xml_path)
+        response = {'errors': [], 'warnings': []}
+    else:
+        response = _run_tool([tools['kramdown'], str(source)], source.parent,
+                             timeout, stdout_path=xml_path)
+        response.pop('output')
+    if response['errors'] or kind == 'xml':
+        if not response['errors']:
+            response['url'] = xml_path.as_uri()
+        return response
+
+    # Validation and idnits work on the plain text rendering
+    flag, extension = {'html': ('--html', 'html'),
+                       'pdf': ('--pdf', 'pdf')}.get(kind, ('--text', 'txt'))
+    output_path = job_dir / f"{source.stem}.{extension}"
+    rendered = _run_tool([tools['xml2rfc'], flag, '-o', str(output_path), str(xml_path)],
+                         job_dir, timeout)
+    response['errors'] += rendered['errors']
+    response['warnings'] += rendered['warnings']
+    if response['errors']:
+        return response
+
+    if kind in ('text', 'html', 'pdf'):
+        response['url'] = output_path.as_uri()
+        return response
+
+    command = [tools['idnits']]
+    if kind == 'idnits':
+        command += ['--verbose'] * int(params.get('verbose', 0))
+        if params.get('submitcheck'):
+            command.append('--submitcheck')
+        if params.get('year'):
+            command += ['--year', str(params['year'])]
+    checked = _run_tool(command + [str(output_path)], job_dir, timeout)
+    response['errors'] += checked['errors']
+    response['warnings'] += checked['warnings']
+    response['idnits' if kind == 'validate' else 'output'] = checked['output']
+    return response
+
+
+class LocalBackend:
+    """Renders documents with locally installed tools instead of the API.
+
+    Jobs run kramdown-rfc and xml2rfc (and idnits for checks) on a pool of
+    worker processes, each in its own temp directory with a per-command
+    timeout. Responses have the same shape as the remote API, with a
+    file:// URL pointing at the artifact.
+    """
+
+    ENDPOINTS = {
+        '/api/render/xml': 'xml',
+        '/api/render/text': 'text',
+        '/api/render/html': 'html',
+        '/api/render/pdf': 'pdf',
+        '/api/validate': 'validate',
+        '/api/idnits': 'idnits',
+    }
+
+    def __init__(self, workers: Optional[int] = None, timeout: float = 120,
+                 kramdown: str = 'kramdown-rfc', xml2rfc: str = 'xml2rfc',
+                 idnits: str = 'idnits'):
+        """Initialize the backend.
+
+        Args:
+            workers: Worker processes (default: number of CPUs)
+            timeout: Seconds allowed for each renderer command
+            kramdown: kramdown-rfc command
+            xml2rfc: xml2rfc command
+            idnits: idnits command
+        """
+        self.timeout = timeout
+        self.tools = {'kramdown': kramdown, 'xml2rfc': xml2rfc, 'idnits': idnits}
+        self._work_dir = tempfile.TemporaryDirectory(prefix='at-local-')
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    def request(self, endpoint: str, file_path: Path,
+                params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run the local equivalent of an API endpoint.
+
+        Args:
+            endpoint: API endpoint path
+            file_path: Path to the markdown file
+            params: Optional query parameters
+
+        Returns:
+            Response dict with url, errors, and warnings
+        """
+        future = self._executor.submit(_local_job, self.ENDPOINTS[endpoint],
+                                       str(file_path), self._work_dir.name,
+                                       self.tools, self.timeout, params or {})
+        return future.result()
+
+    def release(self, url: str) -> None:
+        """Remove the job directory of an artifact that has been read.
+
+        Args:
+            url: file:// URL from a response of this backend
+        """
+        job_dir = Path(url2pathname(urlparse(url).path)).parent
+        if job_dir.parent == Path(self._work_dir.name):
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def close(self) -> None:
+        """Stop the worker processes and remove rendered artifacts."""
+        self._executor.shutdown(cancel_futures=True)
+        self._work_dir.cleanup()
 
 
 class IETFAuthorTools:
-    """Client for IETF Author Tools API."""
+    """Client for IETF Author Tools API.
 
-    BASE_URL = "https://author-tools.ietf.org"
+    Requests go to the remote API unless a LocalBackend is supplied, in
+    which case the same endpoints are served by local renderer commands.
+    """
 
-    def __init__(self, api_key: Optional[str] = None):
+    BASE_URL = "https://author-tools.ietf.org"
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    DOWNLOAD_RESUMES = 3
+    DOWNLOAD_TIMEOUT = 60
+
+    def __init__(self, api_key: Optional[str] = None,
+                 cache: Optional[RenderCache] = None,
+                 verify_downloads: bool = False, pool_size: int = 10,
+                 scheduler: Optional[RequestScheduler] = None,
+                 backend: Optional[LocalBackend] = None,
+                 metrics: Optional[Metrics] = None):
         """Initialize the API client.
 
         Args:
             api_key: Optional API key for authentication
+            cache: Optional response and artifact cache
+            verify_downloads: Check downloads against server size/ETag
+            pool_size: Keep-alive connections to hold per host; match this
+                to the number of concurrent workers sharing the client
+            scheduler: Rate limiter and retry policy for all requests
+            backend: Optional local backend replacing the remote API
+            metrics: Collector for per-operation timings
         """
+        _import_dependencies()
         self.api_key = api_key
+        self.backend = backend
+        self.metrics = metrics or Metrics()
+        self.cache = cache
+        self.scheduler = scheduler or RequestScheduler()
+        self.verify_downloads = verify_downloads
         self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4,
+                                                pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         if api_key:
             self.session.headers['X-API-KEY'] = api_key
 
@@ -58,20 +744,65 @@ class IETFAuthorTools:
         Raises:
             requests.RequestException: On request failure
         """
-        url = f"{self.BASE_URL}{endpoint}"
-
-        with open(file_path, 'rb') as f:
-            files = {'file': (file_path.name, f, 'text/markdown')}
+        url = f"{self.BASE_URL}{endpoint}" if self.backend is None else f"local:{endpoint}"
+        operation = endpoint[len('/api/'):].replace('/', '_')
+        start = time.perf_counter()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(file_path, url, params)
+            cached = self.cache.get(cache_key,
+                                    require_artifact=endpoint.startswith('/api/render/'))
+            if cached is not None:
+                self.metrics.record(operation, time.perf_counter() - start, cache_hit=True)
+                return cached
+
+        if self.backend is not None:
+            result = self.backend.request(endpoint, file_path, params)
+            elapsed = time.perf_counter() - start
+            self.metrics.record(operation, elapsed, phases={'local_render': elapsed})
+            # Failures such as a missing tool or a timeout must not outlive this run
+            succeeded = not result.get('errors') and (
+                'url' in result or not endpoint.startswith('/api/render/'))
+            if cache_key is not None and succeeded:
+                self.cache.put(cache_key, result)
+            return result
+
+        # Add API key to form data if not in headers
+        data = {}
+        if self.api_key and 'X-API-KEY' not in self.session.headers:
+            data['apikey'] = self.api_key
+
+        content_type = 'application/xml' if file_path.suffix == '.xml' else 'text/markdown'
+
+        def post() -> requests.Response:
+            with open(file_path, 'rb') as f:
+                files = {'file': (file_path.name, f, content_type)}
+                return self.session.post(url, files=files, data=data, params=params)
 
-            # Add API key to form data if not in headers
-            data = {}
-            if self.api_key and 'X-API-KEY' not in self.session.headers:
-                data['apikey'] = self.api_key
-
-            response = self.session.post(url, files=files, data=data, params=params)
-            response.raise_for_status()
+        try:
+            response = self.scheduler.send(post)
+        except requests.RequestException:
+            self.metrics.record(operation, time.perf_counter() - start, failed=True,
+                                retries=self.scheduler.last_retries,
+                                phases={'queue': self.scheduler.last_wait})
+            raise
+
+        # Upload and server processing are not separable from the client,
+        # so both count towards the request phase
+        self.metrics.record(operation, time.perf_counter() - start,
+                            status=response.status_code,
+                            sent=len(response.request.body or b''),
+                            received=len(response.content),
+                            retries=self.scheduler.last_retries,
+                            phases={'queue': self.scheduler.last_wait,
+                                    'request': response.elapsed.total_seconds()})
+        response.raise_for_status()
 
-        return response.json()
+        result = response.json()
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
 
     def render_text(self, file_path: Path) -> Dict[str, Any]:
         """Render to text format.
@@ -149,19 +880,159 @@ class IETFAuthorTools:
 
         return self._make_request('/api/idnits', file_path, params=params)
 
-    def download_file(self, url: str, output_path: Path) -> None:
+    def download_file(self, url: str, output_path: Path,
+                      verify: Optional[bool] = None) -> None:
         """Download a file from a URL.
 
+        The body is streamed in chunks to a partial file next to the output
+        and atomically renamed into place once complete, so the output path
+        never holds a truncated artifact. Interrupted transfers are resumed
+        with HTTP Range requests, including a partial file left behind by
+        an earlier run for the same URL.
+
         Args:
             url: URL to download from
             output_path: Path to save the file to
+            verify: Check the result against the size and ETag reported by
+                the server (default: the client's verify_downloads setting)
+
+        Raises:
+            requests.RequestException: On request failure or checksum mismatch
         """
-        response = self.session.get(url)
-        response.raise_for_status()
+        if verify is None:
+            verify = self.verify_downloads
 
+        start = time.perf_counter()
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
+
+        cached = self.cache.artifact(url) if self.cache is not None else None
+        cache_hit = cached is not None
+        if cached is None and urlparse(url).scheme == 'file':
+            # Artifact rendered by the local backend
+            cached = Path(url2pathname(urlparse(url).path))
+        if cached is not None:
+            tmp_path = output_path.with_name(f".{output_path.name}.{threading.get_ident()}.tmp")
+            shutil.copyfile(cached, tmp_path)
+            os.replace(tmp_path, output_path)
+            if self.cache is not None and not cache_hit:
+                self.cache.put_artifact(url, output_path)
+            if self.backend is not None and not cache_hit:
+                self.backend.release(url)
+            elapsed = time.perf_counter() - start
+            self.metrics.record('download', elapsed, cache_hit=cache_hit,
+                                phases={'write': elapsed})
+            return
+
+        # Keyed by URL so a partial file is only ever resumed for the same artifact
+        url_id = hashlib.sha1(url.encode()).hexdigest()[:12]
+        part_path = output_path.with_name(f".{output_path.name}.{url_id}.part")
+
+        etag = None
+        total = None
+        status = None
+        received = 0
+        retries = 0
+        phases = {'queue': 0.0, 'transfer': 0.0, 'write': 0.0}
+        try:
+            attempt = 0
+            while True:
+                offset = part_path.stat().st_size if part_path.exists() else 0
+                # Byte offsets and sizes must count the bytes on the wire, so
+                # ask for the body without content coding
+                headers = {'Accept-Encoding': 'identity'}
+                if offset:
+                    headers['Range'] = f"bytes={offset}-"
+                    if etag:
+                        headers['If-Range'] = etag
+
+                try:
+                    response = self.scheduler.send(lambda: self.session.get(
+                        url, headers=headers, stream=True, timeout=self.DOWNLOAD_TIMEOUT))
+                    retries += self.scheduler.last_retries
+                    phases['queue'] += self.scheduler.last_wait
+                    status = response.status_code
+                    with response:
+                        if response.status_code == 416 and offset:
+                            # Stale partial file; start over from zero
+                            # without using up an attempt
+                            part_path.unlink()
+                            continue
+                        response.raise_for_status()
+
+                        etag = response.headers.get('ETag', etag)
+                        if response.status_code == 206:
+                            content_range = response.headers.get('Content-Range', '')
+                            if content_range.rpartition('/')[2].isdigit():
+                                total = int(content_range.rpartition('/')[2])
+                            mode = 'ab'
+                        else:
+                            if 'Content-Length' in response.headers:
+                                total = int(response.headers['Content-Length'])
+                            mode = 'wb'
+
+                        with open(part_path, mode) as f:
+                            mark = time.perf_counter()
+                            for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                                now = time.perf_counter()
+                                phases['transfer'] += now - mark
+                                f.write(chunk)
+                                received += len(chunk)
+                                mark = time.perf_counter()
+                                phases['write'] += mark - now
+                    break
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError):
+                    if attempt == self.DOWNLOAD_RESUMES:
+                        raise
+                    attempt += 1
+                    retries += 1
+
+            if verify:
+                self._verify_download(part_path, total, etag)
+
+            os.replace(part_path, output_path)
+            failed = False
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.metrics.record('download', time.perf_counter() - start, status=status,
+                                received=received, retries=retries, failed=failed,
+                                phases=phases)
+
+        if self.cache is not None:
+            self.cache.put_artifact(url, output_path)
+
+    def _verify_download(self, path: Path, size: Optional[int],
+                         etag: Optional[str]) -> None:
+        """Check a downloaded file against the size and ETag from the server.
+
+        The ETag is only compared when it is a strong validator holding an
+        MD5 digest, which is what static file servers commonly send.
+
+        Args:
+            path: Downloaded file
+            size: Expected size in bytes, if known
+            etag: ETag header value, if any
+
+        Raises:
+            requests.RequestException: If the file does not match
+        """
+        actual_size = path.stat().st_size
+        if size is not None and actual_size != size:
+            path.unlink()
+            raise requests.RequestException(
+                f"Size mismatch for {path.name}: expected {size}, got {actual_size}")
+
+        tag = (etag or '').strip('"')
+        if etag and not etag.startswith('W/') and re.fullmatch(r'[0-9a-fA-F]{32}', tag):
+            digest = hashlib.md5()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.DOWNLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            if digest.hexdigest() != tag.lower():
+                path.unlink()
+                raise requests.RequestException(f"Checksum mismatch for {path.name}")
 
 
 def extract_docname(file_path: Path) -> str:
@@ -220,57 +1091,173 @@ def print_issues(response: Dict[str, Any], verbose: bool = False) -> bool:
     return has_errors
 
 
-def render_all(client: IETFAuthorTools, file_path: Path, output_dir: Path,
-               verbose: bool = False) -> bool:
-    """Render to all formats.
+# Render formats: name -> (client method, output file extension)
+FORMATS = {
+    'xml': ('render_xml', 'xml'),
+    'txt': ('render_text', 'txt'),
+    'html': ('render_html', 'html'),
+    'pdf': ('render_pdf', 'pdf'),
+}
+
+# Seconds between checks for changed inputs in watch mode
+WATCH_POLL_INTERVAL = 0.1
+
+# Serializes multi-line console output from concurrent workers
+_print_lock = threading.Lock()
+
+
+def render_format(client: IETFAuthorTools, format_name: str, file_path: Path,
+                  output_path: Path, verbose: bool = False,
+                  cancel: Optional[threading.Event] = None) -> bool:
+    """Render a single format and download the result.
 
     Args:
         client: API client instance
+        format_name: Format key from FORMATS
         file_path: Input markdown file
-        output_dir: Output directory
+        output_path: Where to save the rendered artifact
         verbose: Print verbose output
+        cancel: Optional event; when set, the render or download is skipped
 
     Returns:
         True if successful, False if errors occurred
     """
-    docname = extract_docname(file_path)
-    formats = [
-        ('xml', client.render_xml, f"{docname}.xml"),
-        ('txt', client.render_text, f"{docname}.txt"),
-        ('html', client.render_html, f"{docname}.html"),
-        ('pdf', client.render_pdf, f"{docname}.pdf"),
-    ]
+    label = format_name.upper()
+    render_func = getattr(client, FORMATS[format_name][0])
 
-    success = True
-
-    for format_name, render_func, output_filename in formats:
-        print(f"\n🔄 Rendering to {format_name.upper()}...")
+    if cancel is not None and cancel.is_set():
+        return False
 
-        try:
-            response = render_func(file_path)
+    try:
+        response = render_func(file_path)
 
+        with _print_lock:
             if print_issues(response, verbose):
-                print(f"❌ {format_name.upper()} rendering had errors")
-                success = False
-                continue
+                print(f"❌ {label} rendering had errors")
+                return False
 
             if 'url' not in response:
-                print(f"❌ No URL returned for {format_name.upper()}")
-                success = False
-                continue
+                print(f"❌ No URL returned for {label}")
+                return False
+
+        if cancel is not None and cancel.is_set():
+            if client.backend is not None:
+                client.backend.release(response['url'])
+            with _print_lock:
+                print(f"⏹️  {label} cancelled")
+            return False
+
+        # Download as soon as the render URL is available. The artifact is
+        # staged so a render cancelled mid-download never replaces the output;
+        # the staged name only depends on the URL, so a later run can resume
+        # an interrupted download.
+        url_id = hashlib.sha1(response['url'].encode()).hexdigest()[:12]
+        staged_path = output_path.with_name(f".{output_path.name}.{url_id}.staged")
+        client.download_file(response['url'], staged_path)
+        if cancel is not None and cancel.is_set():
+            staged_path.unlink()
+            with _print_lock:
+                print(f"⏹️  {label} cancelled")
+            return False
+        os.replace(staged_path, output_path)
+
+        with _print_lock:
+            print(f"✅ {label} saved to: {output_path}")
+        return True
 
-            # Download the rendered file
-            output_path = output_dir / output_filename
-            client.download_file(response['url'], output_path)
+    except requests.RequestException as e:
+        with _print_lock:
+            print(f"❌ Error rendering {label}: {e}")
+    except Exception as e:
+        with _print_lock:
+            print(f"❌ Unexpected error rendering {label}: {e}")
 
-            print(f"✅ {format_name.upper()} saved to: {output_path}")
+    return False
 
-        except requests.RequestException as e:
-            print(f"❌ Error rendering {format_name.upper()}: {e}")
-            success = False
-        except Exception as e:
-            print(f"❌ Unexpected error rendering {format_name.upper()}: {e}")
+
+def render_all(client: IETFAuthorTools, file_path: Path, output_dir: Path,
+               verbose: bool = False, formats: Optional[List[str]] = None,
+               jobs: int = 4, validate: bool = False, idnits: bool = False,
+               idnits_verbose: int = 0, submission: bool = False,
+               fail_fast: bool = False,
+               cancel: Optional[threading.Event] = None,
+               via_xml: bool = False) -> bool:
+    """Render to all formats as a concurrent pipeline.
+
+    Each format is rendered and downloaded by its own task on a bounded
+    worker pool sharing the client session, so a download starts as soon
+    as its render URL comes back. Validation and idnits checks can run
+    alongside the renders.
+
+    With via_xml, the markdown is converted to XML once and the derived
+    formats are rendered from that XML, so the kramdown conversion is not
+    repeated per format. Errors in the XML stage skip the derived formats.
+
+    Args:
+        client: API client instance
+        file_path: Input markdown file
+        output_dir: Output directory
+        verbose: Print verbose output
+        formats: Format names to render (default: all of FORMATS)
+        jobs: Maximum number of concurrent requests
+        validate: Also validate the document
+        idnits: Also run idnits checks
+        idnits_verbose: Idnits verbosity level (0-2)
+        submission: Enable submission validation for idnits
+        fail_fast: Cancel remaining work when a check reports errors
+        cancel: Optional event that abandons remaining work when set
+        via_xml: Render XML first and derive the other formats from it
+
+    Returns:
+        True if successful, False if errors occurred
+    """
+    docname = extract_docname(file_path)
+    formats = formats or list(FORMATS)
+    if cancel is None:
+        cancel = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor, \
+            tempfile.TemporaryDirectory(prefix='at-xml-') as xml_dir:
+        # Checks are submitted first so fail-fast can stop pending renders
+        checks = []
+        if validate:
+            checks.append(executor.submit(
+                validate_document, client, file_path, verbose))
+        if idnits:
+            checks.append(executor.submit(
+                run_idnits, client, file_path, idnits_verbose, submission))
+
+        success = True
+        source = file_path
+        if via_xml and formats != ['xml']:
+            # Keep the intermediate XML out of the output unless it was asked for
+            xml_path = (output_dir if 'xml' in formats else Path(xml_dir)) / f"{docname}.xml"
+            print("\n🔄 Rendering to XML...")
+            if render_format(client, 'xml', file_path, xml_path, verbose, cancel):
+                source = xml_path
+                formats = [name for name in formats if name != 'xml']
+            else:
+                print("❌ XML stage failed, skipping derived formats")
+                success = False
+                formats = []
+
+        renders = []
+        for format_name in formats:
+            print(f"\n🔄 Rendering to {format_name.upper()}...")
+            output_path = output_dir / f"{docname}.{FORMATS[format_name][1]}"
+            renders.append(executor.submit(
+                render_format, client, format_name, source, output_path,
+                verbose, cancel))
+
+        for future in as_completed(checks + renders):
+            if not future.cancelled() and future.result():
+                continue
             success = False
+            if fail_fast and future in checks and not cancel.is_set():
+                print("\n⏹️  Checks failed, cancelling remaining work")
+                cancel.set()
+                for pending in renders:
+                    pending.cancel()
 
     return success
 
@@ -291,25 +1278,26 @@ def validate_document(client: IETFAuthorTools, file_path: Path, verbose: bool =
     try:
         response = client.validate(file_path)
 
-        # Print validation results
-        if 'errors' in response and response['errors']:
-            print("\n❌ Validation Errors:")
-            for error in response['errors']:
-                print(f"  {error}")
+        with _print_lock:
+            # Print validation results
+            if 'errors' in response and response['errors']:
+                print("\n❌ Validation Errors:")
+                for error in response['errors']:
+                    print(f"  {error}")
 
-        if 'warnings' in response and response['warnings']:
-            print("\n⚠️  Validation Warnings:")
-            for warning in response['warnings']:
-                print(f"  {warning}")
+            if 'warnings' in response and response['warnings']:
+                print("\n⚠️  Validation Warnings:")
+                for warning in response['warnings']:
+                    print(f"  {warning}")
 
-        if verbose and 'idnits' in response:
-            print("\n📋 Idnits Output:")
-            print(response['idnits'])
+            if verbose and 'idnits' in response:
+                print("\n📋 Idnits Output:")
+                print(response['idnits'])
 
-        has_errors = bool(response.get('errors'))
+            has_errors = bool(response.get('errors'))
 
-        if not has_errors:
-            print("\n✅ Validation passed!")
+            if not has_errors:
+                print("\n✅ Validation passed!")
 
         return not has_errors
 
@@ -339,17 +1327,18 @@ def run_idnits(client: IETFAuthorTools, file_path: Path,
     try:
         response = client.idnits(file_path, verbose=verbose, submission=submission)
 
-        if 'output' in response:
-            print("\n📋 Idnits Output:")
-            print(response['output'])
+        with _print_lock:
+            if 'output' in response:
+                print("\n📋 Idnits Output:")
+                print(response['output'])
 
-        # Idnits returns success if there are no errors
-        success = not response.get('errors')
+            # Idnits returns success if there are no errors
+            success = not response.get('errors')
 
-        if success:
-            print("\n✅ Idnits checks passed!")
-        else:
-            print("\n❌ Idnits checks found issues")
+            if success:
+                print("\n✅ Idnits checks passed!")
+            else:
+                print("\n❌ Idnits checks found issues")
 
         return success
 
@@ -361,8 +1350,200 @@ def run_idnits(client: IETFAuthorTools, file_path: Path,
         return False
 
 
-def main():
-    """Main entry point."""
+def expand_inputs(patterns: List[Path]) -> List[Path]:
+    """Expand input paths and glob patterns into a list of files.
+
+    Args:
+        patterns: Input paths, possibly containing glob wildcards
+
+    Returns:
+        Unique input files in argument order, or an empty list if any
+        path is missing or a pattern matches nothing
+    """
+    inputs = []
+    for pattern in patterns:
+        if glob.has_magic(str(pattern)):
+            matches = sorted(Path(p) for p in glob.glob(str(pattern), recursive=True))
+            if not matches:
+                print(f"Error: No input files match: {pattern}")
+                return []
+        elif not pattern.exists():
+            print(f"Error: Input file not found: {pattern}")
+            return []
+        else:
+            matches = [pattern]
+
+        for match in matches:
+            if match not in inputs:
+                inputs.append(match)
+
+    return inputs
+
+
+def process_document(client: IETFAuthorTools, file_path: Path,
+                     args: argparse.Namespace,
+                     cancel: Optional[threading.Event] = None) -> bool:
+    """Run the requested action on one document.
+
+    Args:
+        client: API client instance
+        file_path: Input markdown file
+        args: Parsed command line arguments
+        cancel: Optional event that abandons an in-flight render when set
+
+    Returns:
+        True if successful, False if errors occurred
+    """
+    # Extract docname for output files
+    docname = extract_docname(file_path)
+    print(f"📄 Processing: {file_path.name}")
+    print(f"📋 Document: {docname}")
+
+    if args.validate:
+        return validate_document(client, file_path, args.verbose)
+
+    if args.idnits:
+        return run_idnits(client, file_path, args.idnits_verbose, args.submission)
+
+    # Default: render to all formats, or just the selected ones
+    formats = [name for name, selected in (
+        ('xml', args.xml_only), ('txt', args.txt_only),
+        ('html', args.html_only), ('pdf', args.pdf_only)) if selected]
+    return render_all(client, file_path, args.output, args.verbose,
+                      formats=formats or None, jobs=args.jobs,
+                      validate=args.check, idnits=args.check_idnits,
+                      idnits_verbose=args.idnits_verbose,
+                      submission=args.submission,
+                      fail_fast=args.fail_fast, cancel=cancel,
+                      via_xml=args.via_xml)
+
+
+def run_batch(client: IETFAuthorTools, inputs: List[Path],
+              args: argparse.Namespace, doc_jobs: int) -> bool:
+    """Process many documents concurrently and print a summary table.
+
+    Args:
+        client: API client instance
+        inputs: Input markdown files
+        args: Parsed command line arguments
+        doc_jobs: Number of documents to process at once
+
+    Returns:
+        True if every document succeeded, False otherwise
+    """
+    def timed(file_path: Path):
+        start = time.monotonic()
+        try:
+            ok = process_document(client, file_path, args)
+        except Exception as e:
+            with _print_lock:
+                print(f"❌ Unexpected error processing {file_path}: {e}")
+            ok = False
+        return ok, time.monotonic() - start
+
+    print(f"📚 Processing {len(inputs)} documents ({doc_jobs} at a time)")
+
+    with ThreadPoolExecutor(max_workers=doc_jobs) as executor:
+        results = list(executor.map(timed, inputs))
+
+    width = max(len(str(p)) for p in inputs)
+    print(f"\n{'Document':<{width}}  Status  Time")
+    print(f"{'-' * width}  ------  ------")
+    for file_path, (ok, elapsed) in zip(inputs, results):
+        status = 'ok' if ok else 'FAILED'
+        print(f"{str(file_path):<{width}}  {status:<6}  {elapsed:5.1f}s")
+
+    failed = sum(1 for ok, _ in results if not ok)
+    print(f"\n{len(inputs) - failed} succeeded, {failed} failed")
+    return failed == 0
+
+
+def watch_documents(client: IETFAuthorTools, inputs: List[Path],
+                    args: argparse.Namespace) -> None:
+    """Re-render documents whenever they change, until interrupted.
+
+    Files are polled for changes and a burst of saves is debounced into a
+    single render. When a newer edit arrives while a render is still in
+    flight, the old render is cancelled and its results are discarded.
+    The same client, and therefore the same warm session, is reused for
+    every render.
+
+    Args:
+        client: API client instance
+        inputs: Input markdown files to watch
+        args: Parsed command line arguments
+    """
+    def signature(file_path: Path):
+        try:
+            info = file_path.stat()
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    # Per file: last seen signature, time of the last unrendered change
+    # and the in-flight render (thread, cancel event)
+    seen = {p: signature(p) for p in inputs}
+    changed_at = {p: 0.0 for p in inputs}
+    running: Dict[Path, Any] = {}
+
+    print(f"👀 Watching {len(inputs)} file(s), press Ctrl+C to stop")
+
+    try:
+        while True:
+            now = time.monotonic()
+            for file_path in inputs:
+                sig = signature(file_path)
+                if sig is not None and sig != seen[file_path]:
+                    seen[file_path] = sig
+                    changed_at[file_path] = now
+
+                pending = changed_at[file_path]
+                if pending is None or now - pending < args.debounce:
+                    continue
+                changed_at[file_path] = None
+
+                previous = running.get(file_path)
+                if previous is not None and previous[0].is_alive():
+                    with _print_lock:
+                        print(f"\n⏹️  {file_path.name} changed, cancelling in-flight render")
+                    previous[1].set()
+
+                cancel = threading.Event()
+                thread = threading.Thread(target=process_document,
+                                          args=(client, file_path, args, cancel),
+                                          daemon=True)
+                running[file_path] = (thread, cancel)
+                thread.start()
+
+            time.sleep(WATCH_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+
+def positive_float(value: str) -> float:
+    """argparse type for a number greater than zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    """argparse type for a whole number of zero or more."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
     parser = argparse.ArgumentParser(
         description='IETF Author Tools API Client - Render and validate Internet-Drafts',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -383,17 +1564,43 @@ Examples:
   # Render with verbose output
   %(prog)s vconz.md -v
 
+  # Force a fresh render, ignoring cached results
+  %(prog)s vconz.md --no-cache
+
+  # Render while validating, stopping early on validation errors
+  %(prog)s vconz.md --check --fail-fast
+
+  # Re-render HTML on every save while editing
+  %(prog)s vconz.md --watch --html-only
+
+  # Render offline with locally installed kramdown-rfc and xml2rfc
+  %(prog)s vconz.md --backend local
+
+  # Render every draft in a directory in one run
+  %(prog)s 'drafts/*.md' -J 8
+
+  # Keep a warm session in the background; later runs use it automatically
+  %(prog)s --daemon &
+  %(prog)s vconz.md
+
   # Use custom API key
   %(prog)s vconz.md --api-key YOUR_KEY_HERE
         """
     )
 
-    parser.add_argument('input', type=Path, help='Input markdown file')
+    parser.add_argument('input', type=Path, nargs='*',
+                       help='Input markdown files or glob patterns')
     parser.add_argument('-o', '--output', type=Path, default=Path('vconz'),
                        help='Output directory (default: vconz/)')
     parser.add_argument('-k', '--api-key', help='API key (or set IETF_API_KEY in .env)')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='Verbose output (show warnings)')
+    parser.add_argument('--verify-downloads', action='store_true',
+                       help='Check downloaded files against server size/ETag')
+    parser.add_argument('--metrics', type=Path, metavar='PATH',
+                       help='Write per-operation timings and counters as JSON')
+    parser.add_argument('--metrics-prom', type=Path, metavar='PATH',
+                       help='Write metrics in Prometheus textfile format')
 
     # Action flags
     action_group = parser.add_argument_group('actions')
@@ -414,11 +1621,115 @@ Examples:
     action_group.add_argument('--pdf-only', action='store_true',
                              help='Render PDF only')
 
-    args = parser.parse_args()
+    # Pipeline options
+    pipeline_group = parser.add_argument_group('pipeline')
+    pipeline_group.add_argument('-j', '--jobs', type=int, default=4,
+                               help='Maximum concurrent requests per document (default: 4)')
+    pipeline_group.add_argument('-J', '--doc-jobs', type=int, default=4,
+                               help='Documents processed at once in batch mode (default: 4)')
+    pipeline_group.add_argument('--via-xml', action='store_true',
+                               help='Render XML once and derive the other formats from it')
+    pipeline_group.add_argument('--check', action='store_true',
+                               help='Validate alongside rendering')
+    pipeline_group.add_argument('--check-idnits', action='store_true',
+                               help='Run idnits alongside rendering')
+    pipeline_group.add_argument('--fail-fast', action='store_true',
+                               help='Cancel remaining renders when checks report errors')
+
+    # Backend options
+    backend_group = parser.add_argument_group('backend')
+    backend_group.add_argument('--backend', choices=['remote', 'local'], default='remote',
+                              help='Render with the Author Tools API or local '
+                                   'kramdown-rfc/xml2rfc (default: remote)')
+    backend_group.add_argument('--local-workers', type=int, default=None,
+                              help='Worker processes for the local backend (default: CPUs)')
+    backend_group.add_argument('--local-timeout', type=float, default=120,
+                              help='Seconds allowed per local renderer command (default: 120)')
+
+    # Watch options
+    watch_group = parser.add_argument_group('watch')
+    watch_group.add_argument('-w', '--watch', action='store_true',
+                            help='Re-render whenever the input changes')
+    watch_group.add_argument('--debounce', type=float, default=0.5,
+                            help='Seconds to wait for edits to settle (default: 0.5)')
+
+    # Daemon options
+    daemon_group = parser.add_argument_group('daemon')
+    daemon_group.add_argument('--daemon', action='store_true',
+                             help='Run a warm background server for later invocations')
+    daemon_group.add_argument('--stop-daemon', action='store_true',
+                             help='Stop a running daemon')
+    daemon_group.add_argument('--no-daemon', action='store_true',
+                             help='Always run in-process, even if a daemon is running')
+    daemon_group.add_argument('--socket', type=Path, default=default_socket_path(),
+                             help='Daemon socket path (default: %(default)s)')
+
+    # Rate limiting options
+    rate_group = parser.add_argument_group('rate limiting')
+    rate_group.add_argument('--rate', type=positive_float, default=5.0,
+                           help='Maximum requests per second across all workers (default: 5)')
+    rate_group.add_argument('--retries', type=non_negative_int, default=5,
+                           help='Retries for throttled or failed requests (default: 5)')
+
+    # Cache options
+    cache_group = parser.add_argument_group('cache')
+    cache_group.add_argument('--cache-dir', type=Path, default=RenderCache.default_dir(),
+                            help='Response cache directory (default: %(default)s)')
+    cache_group.add_argument('--no-cache', action='store_true',
+                            help='Bypass the response cache')
+    cache_group.add_argument('--clear-cache', action='store_true',
+                            help='Clear the response cache before running')
+    cache_group.add_argument('--cache-max-size', type=int, default=256,
+                            help='Maximum cache size in MB (default: 256)')
+    cache_group.add_argument('--cache-max-age', type=float, default=30,
+                            help='Maximum cache entry age in days (default: 30)')
+
+    return parser
+
+
+def make_client(args: argparse.Namespace, api_key: Optional[str],
+                pool_size: int) -> IETFAuthorTools:
+    """Create a client configured from command line arguments.
 
-    # Load environment variables
-    load_dotenv()
+    Args:
+        args: Parsed command line arguments
+        api_key: API key, if any
+        pool_size: Number of workers that will share the session
+
+    Returns:
+        A new client
+    """
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(args.cache_dir,
+                            max_size=args.cache_max_size * 1024 * 1024,
+                            max_age=args.cache_max_age * 24 * 3600)
 
+    backend = None
+    if args.backend == 'local':
+        backend = LocalBackend(workers=args.local_workers, timeout=args.local_timeout)
+
+    return IETFAuthorTools(api_key, cache=cache,
+                           verify_downloads=args.verify_downloads,
+                           pool_size=pool_size,
+                           scheduler=RequestScheduler(rate=args.rate,
+                                                      burst=max(1, int(args.rate)),
+                                                      max_retries=args.retries),
+                           backend=backend)
+
+
+def run(args: argparse.Namespace,
+        clients: Optional[Dict[tuple, IETFAuthorTools]] = None) -> int:
+    """Run the command described by the arguments.
+
+    Args:
+        args: Parsed command line arguments
+        clients: Warm clients to reuse, keyed by their configuration; when
+            given, new clients are added to it and kept open afterwards
+
+    Returns:
+        Process exit code
+    """
     # Get API key from args or environment
     api_key = args.api_key or os.getenv('IETF_API_KEY')
 
@@ -426,94 +1737,259 @@ Examples:
         print("Warning: No API key provided. Some features may be rate-limited.")
         print("Set IETF_API_KEY in .env or use --api-key option.")
 
-    # Check input file exists
-    if not args.input.exists():
-        print(f"Error: Input file not found: {args.input}")
-        sys.exit(1)
+    inputs = expand_inputs(args.input)
+    if not inputs:
+        return 1
 
-    # Create API client
-    client = IETFAuthorTools(api_key)
+    if args.clear_cache:
+        RenderCache(args.cache_dir).clear()
+        print(f"🗑️  Cleared cache: {args.cache_dir}")
 
-    # Extract docname for output files
-    docname = extract_docname(args.input)
-    print(f"📄 Processing: {args.input.name}")
-    print(f"📋 Document: {docname}")
+    # One pooled session shared by every document and format worker
+    doc_jobs = max(1, min(args.doc_jobs, len(inputs)))
+    pool_size = doc_jobs * max(1, args.jobs)
+    if clients is None:
+        client = make_client(args, api_key, pool_size)
+    else:
+        config = (api_key, args.cache_dir, args.no_cache, args.cache_max_size,
+                  args.cache_max_age, args.verify_downloads, args.rate, args.retries,
+                  args.backend, args.local_workers, args.local_timeout, pool_size)
+        if config not in clients:
+            clients[config] = make_client(args, api_key, pool_size)
+        client = clients[config]
+        client.metrics = Metrics()
 
-    # Handle different actions
-    success = True
+    try:
+        if args.watch:
+            watch_documents(client, inputs, args)
+            return 0
 
-    if args.validate:
-        success = validate_document(client, args.input, args.verbose)
+        if len(inputs) == 1:
+            success = process_document(client, inputs[0], args)
+        else:
+            success = run_batch(client, inputs, args, doc_jobs)
 
-    elif args.idnits:
-        success = run_idnits(client, args.input, args.idnits_verbose, args.submission)
+        if success:
+            print("\n✅ All operations completed successfully!")
+            return 0
+        else:
+            print("\n❌ Some operations failed. Check output above.")
+            return 1
+    finally:
+        if clients is None and client.backend is not None:
+            client.backend.close()
+        if args.metrics:
+            client.metrics.write_json(args.metrics)
+        if args.metrics_prom:
+            client.metrics.write_prometheus(args.metrics_prom)
+
+
+def default_socket_path() -> Path:
+    """Return the default daemon socket path."""
+    runtime_dir = os.getenv('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return Path(runtime_dir) / 'ietf-author-tools.sock'
+    # Beside the cache directory, not in it, so --clear-cache leaves it alone
+    cache_dir = RenderCache.default_dir()
+    return cache_dir.with_name(f"{cache_dir.name}-run") / 'daemon.sock'
+
+
+class _SocketWriter:
+    """File-like object that relays printed output to a daemon client."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        if text:
+            with self._lock:
+                self.wfile.write(json.dumps({'out': text}).encode() + b'\n')
+        return len(text)
+
+    def flush(self) -> None:
+        self.wfile.flush()
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    """Runs one forwarded command line with the daemon's warm clients.
+
+    Requests are single JSON lines with the argv, working directory and
+    API key of the invoking shell. Output is streamed back as JSON lines,
+    followed by a final line carrying the exit code.
+    """
 
-    elif args.xml_only:
-        print(f"\n🔄 Rendering to XML...")
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # Liveness probe from _connect()
+            return
+        request = json.loads(line)
+        if request.get('stop'):
+            self.wfile.write(json.dumps({'exit': 0}).encode() + b'\n')
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        writer = _SocketWriter(self.wfile)
+        previous_cwd = os.getcwd()
         try:
-            response = client.render_xml(args.input)
-            if not print_issues(response, args.verbose) and 'url' in response:
-                output_path = args.output / f"{docname}.xml"
-                client.download_file(response['url'], output_path)
-                print(f"✅ XML saved to: {output_path}")
-            else:
-                success = False
+            os.chdir(request['cwd'])
+            with redirect_stdout(writer):
+                args = self.server.parser.parse_args(request['argv'])
+                if not args.api_key:
+                    # The invoking shell's environment or .env, not the daemon's
+                    args.api_key = (request.get('api_key')
+                                    or dotenv.dotenv_values(dotenv.find_dotenv(usecwd=True))
+                                    .get('IETF_API_KEY'))
+                code = run(args, clients=self.server.clients)
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
         except Exception as e:
-            print(f"❌ Error: {e}")
-            success = False
+            writer.write(f"❌ Daemon error: {e}\n")
+            code = 1
+        finally:
+            os.chdir(previous_cwd)
 
-    elif args.txt_only:
-        print(f"\n🔄 Rendering to TXT...")
-        try:
-            response = client.render_text(args.input)
-            if not print_issues(response, args.verbose) and 'url' in response:
-                output_path = args.output / f"{docname}.txt"
-                client.download_file(response['url'], output_path)
-                print(f"✅ TXT saved to: {output_path}")
-            else:
-                success = False
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            success = False
+        self.wfile.write(json.dumps({'exit': code}).encode() + b'\n')
 
-    elif args.html_only:
-        print(f"\n🔄 Rendering to HTML...")
-        try:
-            response = client.render_html(args.input)
-            if not print_issues(response, args.verbose) and 'url' in response:
-                output_path = args.output / f"{docname}.html"
-                client.download_file(response['url'], output_path)
-                print(f"✅ HTML saved to: {output_path}")
-            else:
-                success = False
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            success = False
 
-    elif args.pdf_only:
-        print(f"\n🔄 Rendering to PDF...")
-        try:
-            response = client.render_pdf(args.input)
-            if not print_issues(response, args.verbose) and 'url' in response:
-                output_path = args.output / f"{docname}.pdf"
-                client.download_file(response['url'], output_path)
-                print(f"✅ PDF saved to: {output_path}")
-            else:
-                success = False
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            success = False
+def serve_daemon(parser: argparse.ArgumentParser, socket_path: Path) -> int:
+    """Serve forwarded commands on a Unix socket until stopped.
 
-    else:
-        # Default: render to all formats
-        success = render_all(client, args.input, args.output, args.verbose)
+    Commands are handled one at a time, since output is captured by
+    redirecting stdout. Each command still renders concurrently, on
+    clients whose sessions and caches stay warm between commands.
+
+    Args:
+        parser: Command line parser for forwarded arguments
+        socket_path: Unix socket to listen on
+
+    Returns:
+        Process exit code
+    """
+    sock = _connect(socket_path)
+    if sock is not None:
+        sock.close()
+        print(f"Error: A daemon is already listening on {socket_path}")
+        return 1
+
+    _import_dependencies()
+    dotenv.load_dotenv()
+
+    # Anyone who can connect runs commands as this user, with their API
+    # key, and anyone who can replace the socket receives forwarded keys
+    socket_dir = socket_path.parent
+    socket_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    dir_stat = socket_dir.stat()
+    if not dir_stat.st_mode & stat.S_ISVTX and (
+            dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o022):
+        print(f"Error: {socket_dir} is writable by other users; "
+              f"use a private directory (chmod 700) for --socket")
+        return 1
+    if socket_path.exists():
+        # Left behind by a daemon that did not shut down cleanly
+        socket_path.unlink()
+
+    # Create the socket owner-only, with no window where it is open to others
+    previous_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(str(socket_path), _DaemonHandler)
+    finally:
+        os.umask(previous_umask)
+    server.parser = parser
+    server.clients = {}
+    print(f"🟢 Daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+        for client in server.clients.values():
+            if client.backend is not None:
+                client.backend.close()
+    print("👋 Daemon stopped")
+    return 0
+
+
+def _connect(socket_path: Path) -> Optional[socket.socket]:
+    """Connect to a daemon socket, or return None if nothing is listening."""
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(1)
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def forward_to_daemon(socket_path: Path, request: Dict[str, Any]) -> Optional[int]:
+    """Send a request to a running daemon and relay its output.
 
-    if success:
-        print("\n✅ All operations completed successfully!")
+    Args:
+        socket_path: Daemon socket
+        request: Request to send
+
+    Returns:
+        The command's exit code, or None if no daemon is listening
+    """
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+
+    with sock:
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        for line in sock.makefile('rb'):
+            message = json.loads(line)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            if 'exit' in message:
+                return message['exit']
+
+    print("Error: Daemon closed the connection unexpectedly")
+    return 1
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    argv = sys.argv[1:] if argv is None else argv
+
+    if args.daemon:
+        sys.exit(serve_daemon(parser, args.socket))
+
+    if args.stop_daemon:
+        if forward_to_daemon(args.socket, {'stop': True}) is None:
+            print(f"No daemon listening on {args.socket}")
+            sys.exit(1)
         sys.exit(0)
-    else:
-        print("\n❌ Some operations failed. Check output above.")
-        sys.exit(1)
+
+    if not args.input:
+        parser.error('the following arguments are required: input')
+
+    # Watch mode runs for the whole editing session, so it stays in-process
+    if not args.no_daemon and not args.watch:
+        code = forward_to_daemon(args.socket, {
+            'argv': argv,
+            'cwd': os.getcwd(),
+            'api_key': os.getenv('IETF_API_KEY'),
+        })
+        if code is not None:
+            sys.exit(code)
+
+    _import_dependencies()
+
+    # Load environment variables
+    dotenv.load_dotenv()
+
+    sys.exit(run(args))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Asyncio client for the IETF Author Tools API
+
+Provides AsyncIETFAuthorTools, an event-loop counterpart to the
+synchronous IETFAuthorTools client in at.py, for embedding renders in
+async services without a thread per request. Cache I/O runs on the
+loop's default executor so it never blocks the event loop.
+
+Requires aiohttp, in addition to the requests and python-dotenv
+packages at.py needs: pip install aiohttp
+"""
+
+import asyncio
+import os
+import shutil
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from at import FORMATS, IETFAuthorTools, Metrics, RenderCache, RequestScheduler, extract_docname
+
+try:
+    import aiohttp
+except ImportError as e:
+    raise ImportError("aiohttp library not found. Install with: pip install aiohttp") from e
+
+
+class AsyncIETFAuthorTools:
+    """Async client for IETF Author Tools API.
+
+    All requests share one pooled aiohttp connection pool. Uploads and
+    downloads are streamed, every call accepts its own timeout, and
+    cancelling the awaiting task aborts the request and removes any
+    partial download. Use as an async context manager, or call close().
+    """
+
+    BASE_URL = IETFAuthorTools.BASE_URL
+    DOWNLOAD_CHUNK_SIZE = IETFAuthorTools.DOWNLOAD_CHUNK_SIZE
+
+    def __init__(self, api_key: Optional[str] = None,
+                 cache: Optional[RenderCache] = None, pool_size: int = 100,
+                 timeout: float = 300, max_retries: int = 5,
+                 metrics: Optional[Metrics] = None):
+        """Initialize the API client.
+
+        Args:
+            api_key: Optional API key for authentication
+            cache: Optional response and artifact cache
+            pool_size: Maximum open connections across all requests
+            timeout: Default total timeout in seconds for each call
+            max_retries: Retries for throttled or failed requests
+            metrics: Collector for per-operation timings
+        """
+        self.api_key = api_key
+        self.cache = cache
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.metrics = metrics or Metrics()
+        # Only the backoff policy is shared with the sync client; waiting
+        # happens with asyncio.sleep, never on the scheduler's lock
+        self.retry_policy = RequestScheduler(max_retries=max_retries)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'AsyncIETFAuthorTools':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled HTTP session, created on first use inside the loop."""
+        if self._session is None or self._session.closed:
+            headers = {'X-API-KEY': self.api_key} if self.api_key else None
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                headers=headers)
+        return self._session
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _timeout(self, timeout: Optional[float]) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.timeout if timeout is None else timeout)
+
+    async def _send(self, method: str, url: str, timeout: Optional[float],
+                    make_data=None, **kwargs) -> aiohttp.ClientResponse:
+        """Send a request, retrying throttled and transient failures.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            timeout: Per-call timeout in seconds, or None for the default
+            make_data: Optional callable building a fresh request body for
+                each attempt, since streamed bodies cannot be replayed
+            **kwargs: Passed through to aiohttp
+
+        Returns:
+            The final response, which may still carry an error status
+        """
+        policy = self.retry_policy
+        for attempt in range(policy.max_retries + 1):
+            data = make_data() if make_data is not None else None
+            try:
+                response = await self.session.request(
+                    method, url, data=data, timeout=self._timeout(timeout), **kwargs)
+            except aiohttp.ClientConnectionError as e:
+                # A timeout means the caller's budget is spent; do not retry
+                if isinstance(e, asyncio.TimeoutError) or attempt == policy.max_retries:
+                    raise
+                await asyncio.sleep(policy.retry_delay(attempt))
+                continue
+
+            if response.status not in policy.RETRY_STATUSES or attempt == policy.max_retries:
+                return response
+
+            delay = policy.retry_delay(attempt, response)
+            response.release()
+            await asyncio.sleep(delay)
+
+        return response
+
+    async def _make_request(self, endpoint: str, file_path: Path,
+                            params: Optional[Dict[str, Any]] = None,
+                            timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Make a request to the API.
+
+        Args:
+            endpoint: API endpoint path
+            file_path: Path to the file to upload
+            params: Optional query parameters
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Response JSON data
+
+        Raises:
+            aiohttp.ClientError: On request failure
+            asyncio.TimeoutError: If the call exceeds its timeout
+        """
+        url = f"{self.BASE_URL}{endpoint}"
+        operation = endpoint[len('/api/'):].replace('/', '_')
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        params = {name: str(value) for name, value in (params or {}).items()}
+
+        cache_key = None
+        if self.cache is not None:
+            # Hashing the input and reading the entry are blocking file I/O
+            def lookup():
+                key = self.cache.key(file_path, url, params)
+                return key, self.cache.get(key, require_artifact=endpoint.startswith('/api/render/'))
+
+            cache_key, cached = await loop.run_in_executor(None, lookup)
+            if cached is not None:
+                self.metrics.record(operation, loop.time() - start, cache_hit=True)
+                return cached
+
+        content_type = 'application/xml' if file_path.suffix == '.xml' else 'text/markdown'
+        files = []
+
+        def make_form() -> aiohttp.FormData:
+            # aiohttp streams the open file in chunks instead of buffering it
+            f = open(file_path, 'rb')
+            files.append(f)
+            form = aiohttp.FormData()
+            form.add_field('file', f, filename=file_path.name, content_type=content_type)
+            return form
+
+        try:
+            response = await self._send('POST', url, timeout, make_form, params=params)
+        except BaseException:
+            self.metrics.record(operation, loop.time() - start, failed=True)
+            raise
+        finally:
+            for f in files:
+                f.close()
+
+        async with response:
+            body = await response.read()
+            self.metrics.record(operation, loop.time() - start, status=response.status,
+                                sent=file_path.stat().st_size, received=len(body))
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+
+        if cache_key is not None:
+            # put() writes the entry and prunes the whole cache directory
+            await loop.run_in_executor(None, self.cache.put, cache_key, result)
+        return result
+
+    async def render_text(self, file_path: Path,
+                          timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Render to text format.
+
+        Args:
+            file_path: Path to the markdown file
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            API response with url, errors, and warnings
+        """
+        return await self._make_request('/api/render/text', file_path, timeout=timeout)
+
+    async def render_xml(self, file_path: Path,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Render to XML format.
+
+        Args:
+            file_path: Path to the markdown file
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            API response with url, errors, and warnings
+        """
+        return await self._make_request('/api/render/xml', file_path, timeout=timeout)
+
+    async def render_html(self, file_path: Path,
+                          timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Render to HTML format.
+
+        Args:
+            file_path: Path to the markdown file
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            API response with url, errors, and warnings
+        """
+        return await self._make_request('/api/render/html', file_path, timeout=timeout)
+
+    async def render_pdf(self, file_path: Path,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Render to PDF format.
+
+        Args:
+            file_path: Path to the markdown file
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            API response with url, errors, and warnings
+        """
+        return await self._make_request('/api/render/pdf', file_path, timeout=timeout)
+
+    async def validate(self, file_path: Path,
+                       timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Validate the document.
+
+        Args:
+            file_path: Path to the markdown file
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Validation results with errors, warnings, idnits output
+        """
+        return await self._make_request('/api/validate', file_path, timeout=timeout)
+
+    async def idnits(self, file_path: Path, verbose: int = 0,
+                     submission: bool = False, year: Optional[str] = None,
+                     timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Run idnits checks on the document.
+
+        Args:
+            file_path: Path to the markdown file
+            verbose: Verbosity level (0-2)
+            submission: Enable submission validation mode
+            year: Year for boilerplate checking
+            timeout: Per-call timeout in seconds
+
+        Returns:
+            Idnits check results
+        """
+        params = {'verbose': verbose}
+        if submission:
+            params['submitcheck'] = 'true'
+        if year:
+            params['year'] = year
+
+        return await self._make_request('/api/idnits', file_path, params=params,
+                                        timeout=timeout)
+
+    async def download_file(self, url: str, output_path: Path,
+                            timeout: Optional[float] = None) -> None:
+        """Download a file from a URL.
+
+        The body is streamed to a partial file and atomically renamed into
+        place. On failure or cancellation the partial file is removed, so
+        the output path never holds a truncated artifact.
+
+        Args:
+            url: URL to download from
+            output_path: Path to save the file to
+            timeout: Per-call timeout in seconds
+
+        Raises:
+            aiohttp.ClientError: On request failure
+            asyncio.TimeoutError: If the call exceeds its timeout
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Unique per task, so concurrent downloads to one path cannot collide
+        task_id = id(asyncio.current_task())
+
+        cached = None
+        if self.cache is not None:
+            cached = await loop.run_in_executor(None, self.cache.artifact, url)
+        if cached is not None:
+            tmp_path = output_path.with_name(f".{output_path.name}.{task_id}.tmp")
+            await loop.run_in_executor(None, _copy_atomic, cached, tmp_path, output_path)
+            self.metrics.record('download', loop.time() - start, cache_hit=True)
+            return
+
+        part_path = output_path.with_name(f".{output_path.name}.{task_id}.part")
+        status = None
+        received = 0
+        try:
+            response = await self._send('GET', url, timeout)
+            async with response:
+                status = response.status
+                response.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        received += len(chunk)
+            os.replace(part_path, output_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            self.metrics.record('download', loop.time() - start, status=status,
+                                received=received, failed=True)
+            raise
+
+        self.metrics.record('download', loop.time() - start, status=status,
+                            received=received)
+        if self.cache is not None:
+            await loop.run_in_executor(None, self.cache.put_artifact, url, output_path)
+
+
+def _copy_atomic(source: Path, tmp_path: Path, output_path: Path) -> None:
+    """Copy a file next to its destination and rename it into place."""
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, output_path)
+
+
+async def render_formats(client: AsyncIETFAuthorTools, file_path: Path,
+                         output_dir: Path, formats: Optional[List[str]] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """Render and download several formats concurrently.
+
+    Args:
+        client: Async API client
+        file_path: Input markdown file
+        output_dir: Output directory
+        formats: Format names from at.FORMATS (default: all)
+        timeout: Per-call timeout in seconds
+
+    Returns:
+        API response per format; responses with errors or without a URL
+        are returned as-is and nothing is downloaded for them
+    """
+    docname = extract_docname(file_path)
+
+    async def render(format_name: str) -> Dict[str, Any]:
+        method, extension = FORMATS[format_name]
+        response = await getattr(client, method)(file_path, timeout=timeout)
+        if not response.get('errors') and 'url' in response:
+            await client.download_file(response['url'],
+                                       output_dir / f"{docname}.{extension}",
+                                       timeout=timeout)
+        return response
+
+    formats = formats or list(FORMATS)
+    responses = await asyncio.gather(*(render(name) for name in formats))
+    return dict(zip(formats, responses))
@@ -1,73 +1,284 @@
 #!/usr/bin/env python3
 """
 Script to sync .vcon example files from the IETF vcon repository.
-Downloads the repo to a temp directory and copies all examples/*.vcon files
-to the local working directory.
+Fetches only the examples/ directory, either with a sparse, blob-filtered
+git clone or by streaming a repository archive and extracting just the
+examples, and copies all examples/*.vcon files to the local working directory.
+
+Only files whose SHA-256 differs from the local copy are written, and files
+removed upstream are deleted. list.json is a manifest with one entry per file:
+its name, size and hash plus a summary of the vCon inside, so the example
+picker can be rendered without fetching every file. Every file is also
+validated on a process pool (see validate.py), and the results are written
+to validation.json with a summary, alongside a status in each list.json entry.
 """
 
+import argparse
+import base64
+import hashlib
 import json
 import os
 import shutil
 import subprocess
+import tarfile
 import tempfile
-from pathlib import Path
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
+
+from validate import validate_file
 
 REPO_URL = "https://github.com/ietf-wg-vcon/draft-ietf-vcon-vcon-core"
 
+# Where examples come from: a git URL or path, or a .tar.gz archive URL or path
+SOURCE = os.getenv("VCON_EXAMPLES_SOURCE", REPO_URL)
+
+EXAMPLES_DIR = "examples"
+
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar")
+
+def is_archive(source):
+    """Whether a source names a repository archive rather than a git repository."""
+    return source.endswith(ARCHIVE_SUFFIXES)
+
+def fetch_git(source, dest_dir):
+    """Fetch examples/*.vcon with a shallow, sparse, blob-filtered clone.
+
+    Only the commit's trees and the blobs under examples/ are downloaded and
+    checked out. Servers without partial clone support fall back to a
+    shallow clone, which still checks out only examples/.
+
+    Returns:
+        List of fetched .vcon file paths
+    """
+    repo_path = dest_dir / "repo"
+    print(f"Cloning {EXAMPLES_DIR}/ from: {source}")
+
+    subprocess.run([
+        "git", "clone", "--depth", "1", "--filter=blob:none", "--sparse",
+        "--no-checkout", source, str(repo_path)
+    ], check=True, capture_output=True, text=True)
+    subprocess.run([
+        "git", "-C", str(repo_path), "sparse-checkout", "set", EXAMPLES_DIR
+    ], check=True, capture_output=True, text=True)
+    subprocess.run([
+        "git", "-C", str(repo_path), "checkout"
+    ], check=True, capture_output=True, text=True)
+
+    return sorted((repo_path / EXAMPLES_DIR).glob("*.vcon"))
+
+def fetch_archive(source, dest_dir):
+    """Stream a repository archive and extract only examples/*.vcon.
+
+    The archive is read sequentially from the URL or file, so nothing but
+    the matching members is ever written to disk.
+
+    Returns:
+        List of fetched .vcon file paths
+    """
+    print(f"Streaming {EXAMPLES_DIR}/ from: {source}")
+
+    if os.path.exists(source):
+        stream = open(source, "rb")
+    else:
+        stream = urllib.request.urlopen(source)
+
+    mode = "r|" if source.endswith(".tar") else "r|gz"
+    vcon_files = []
+    with stream, tarfile.open(fileobj=stream, mode=mode) as archive:
+        for member in archive:
+            path = PurePosixPath(member.name)
+            # Archives wrap the tree in a top-level <repo>-<ref>/ directory
+            if (not member.isfile() or path.suffix != ".vcon"
+                    or len(path.parts) < 2 or path.parts[-2] != EXAMPLES_DIR):
+                continue
+            dest_file = dest_dir / path.name
+            with archive.extractfile(member) as src, open(dest_file, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            vcon_files.append(dest_file)
+
+    return sorted(vcon_files)
+
+def decode_jws_payload(doc):
+    """Decode the vCon carried in the payload of a JWS general serialization."""
+    payload = doc["payload"]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+def summarize_vcon(vcon_file):
+    """Build the list.json manifest entry for a .vcon file.
+
+    Signed vCons are summarized from their JWS payload. Encrypted vCons only
+    report the encrypted flag, since their contents cannot be read.
+    """
+    data = vcon_file.read_bytes()
+    entry = {
+        "name": vcon_file.name,
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "vcon": None,
+        "parties": None,
+        "dialogs": None,
+        "signed": False,
+        "encrypted": False,
+        "redacted": False,
+    }
+
+    try:
+        doc = json.loads(data)
+        if not isinstance(doc, dict):
+            raise ValueError("top level is not an object")
+        if "ciphertext" in doc:
+            entry["encrypted"] = True
+            return entry
+        if "payload" in doc and "signatures" in doc:
+            entry["signed"] = True
+            doc = decode_jws_payload(doc)
+            if not isinstance(doc, dict):
+                raise ValueError("JWS payload is not an object")
+    except (ValueError, TypeError) as e:
+        entry["error"] = f"Could not parse: {e}"
+        return entry
+
+    entry["vcon"] = doc.get("vcon")
+    entry["parties"] = len(doc.get("parties") or [])
+    entry["dialogs"] = len(doc.get("dialog") or [])
+    entry["redacted"] = bool(doc.get("redacted"))
+    return entry
+
+def file_sha256(path):
+    """SHA-256 of a local file, or None if it does not exist."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def load_manifest(list_file):
+    """Load list.json; older plain lists of filenames are accepted too."""
+    try:
+        with open(list_file) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [{"name": entry} if isinstance(entry, str) else entry for entry in entries]
+
+def load_reports(report_file):
+    """Load the previous validation reports, keyed by file hash."""
+    try:
+        with open(report_file) as f:
+            return {report["sha256"]: report for report in json.load(f)["files"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def validate_examples(current_dir, manifest, previous_reports):
+    """Validate synced files on a process pool, reusing reports for unchanged files.
+
+    Returns:
+        Report dict with a summary and one entry per file, in manifest order
+    """
+    reports = {}
+    pending = []
+    for entry in manifest:
+        report = previous_reports.get(entry["sha256"])
+        if report is not None:
+            reports[entry["name"]] = dict(report, name=entry["name"])
+        else:
+            pending.append(entry)
+
+    if pending:
+        with ProcessPoolExecutor() as executor:
+            paths = [current_dir / entry["name"] for entry in pending]
+            for entry, report in zip(pending, executor.map(validate_file, paths)):
+                report["sha256"] = entry["sha256"]
+                reports[entry["name"]] = report
+
+    files = [reports[entry["name"]] for entry in manifest]
+    summary = {"total": len(files), "good": 0, "warning": 0, "fail": 0,
+               "errors": 0, "warnings": 0}
+    for report in files:
+        summary[report["status"]] += 1
+        summary["errors"] += len(report["errors"])
+        summary["warnings"] += len(report["warnings"])
+    return {"summary": summary, "files": files}
+
 def main():
+    parser = argparse.ArgumentParser(description="Sync .vcon examples from the vcon-core repository")
+    parser.add_argument("--source", default=SOURCE,
+                        help="Git repository URL or path, or a .tar.gz archive URL or path "
+                             f"(default: {SOURCE})")
+    args = parser.parse_args()
+
     # Get current working directory (already in examples dir)
     current_dir = Path.cwd()
-    
+
     print(f"Syncing .vcon files to: {current_dir}")
-    
+
     # Create temporary directory
     with tempfile.TemporaryDirectory() as temp_dir:
         temp_path = Path(temp_dir)
-        repo_path = temp_path / "repo"
-        
-        print(f"Cloning repository to: {repo_path}")
-        
-        # Clone the repository
+
         try:
-            subprocess.run([
-                "git", "clone", "--depth", "1", REPO_URL, str(repo_path)
-            ], check=True, capture_output=True, text=True)
+            if is_archive(args.source):
+                vcon_files = fetch_archive(args.source, temp_path)
+            else:
+                vcon_files = fetch_git(args.source, temp_path)
         except subprocess.CalledProcessError as e:
             print(f"Error cloning repository: {e}")
             print(f"stderr: {e.stderr}")
             return 1
-        
-        # Find examples directory in the cloned repo
-        repo_examples_dir = repo_path / "examples"
-        
-        if not repo_examples_dir.exists():
-            print(f"No examples directory found in {repo_path}")
+        except (OSError, tarfile.TarError) as e:
+            print(f"Error reading archive: {e}")
             return 1
-        
-        # Find all .vcon files in the examples directory
-        vcon_files = list(repo_examples_dir.glob("*.vcon"))
-        
+
         if not vcon_files:
             print("No .vcon files found in examples directory")
             return 0
-        
+
         print(f"Found {len(vcon_files)} .vcon files")
-        
-        # Copy each .vcon file to current directory
-        synced_files = []
+
+        list_file = current_dir / "list.json"
+        previous = {entry["name"] for entry in load_manifest(list_file)}
+
+        # Copy only new or changed .vcon files to current directory
+        manifest = []
+        copied = 0
         for vcon_file in vcon_files:
+            entry = summarize_vcon(vcon_file)
+            manifest.append(entry)
             dest_file = current_dir / vcon_file.name
+            if file_sha256(dest_file) == entry["sha256"]:
+                continue
             shutil.copy2(vcon_file, dest_file)
-            synced_files.append(vcon_file.name)
-            print(f"Copied: {vcon_file.name}")
-        
-        # Write list.json with array of synced filenames
-        list_file = current_dir / "list.json"
+            copied += 1
+            print(f"{'Updated' if dest_file.name in previous else 'Copied'}: {vcon_file.name}")
+
+        # Remove previously synced files that are gone upstream
+        upstream = {entry["name"] for entry in manifest}
+        removed = 0
+        for name in sorted(previous - upstream):
+            stale_file = current_dir / name
+            if stale_file.exists():
+                stale_file.unlink()
+                removed += 1
+                print(f"Removed: {name}")
+
+        # Validate every synced file and record the results
+        report_file = current_dir / "validation.json"
+        validation = validate_examples(current_dir, manifest, load_reports(report_file))
+        for entry, report in zip(manifest, validation["files"]):
+            entry["status"] = report["status"]
+        with open(report_file, 'w') as f:
+            json.dump(validation, f, indent=2)
+        summary = validation["summary"]
+        print(f"Validated: {summary['good']} good, {summary['warning']} with warnings, "
+              f"{summary['fail']} failed")
+
+        # Write list.json with a manifest entry per synced file
         with open(list_file, 'w') as f:
-            json.dump(synced_files, f, indent=2)
-        print(f"Created: list.json with {len(synced_files)} files")
-        
-        print(f"Successfully synced {len(vcon_files)} .vcon files")
+            json.dump(manifest, f, indent=2)
+        print(f"Created: list.json with {len(manifest)} files")
+
+        print(f"Successfully synced {len(vcon_files)} .vcon files "
+              f"({copied} copied, {len(vcon_files) - copied} unchanged, {removed} removed)")
         return 0
 
 if __name__ == "__main__":
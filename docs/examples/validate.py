@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Structural validation of .vcon files against the vCon core draft.
+Checks required fields, RFC 3339 timestamps, party and dialog index
+references, and the shape of signed (JWS) and encrypted (JWE) forms,
+following the same rules as the browser validator in docs/validator.js.
+Run directly to validate files, or use validate_file() from sync.py.
+"""
+
+import base64
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+SUPPORTED_VERSIONS = ["0.0.1", "0.0.2", "0.3.0"]
+CURRENT_VERSION = "0.3.0"
+
+DIALOG_TYPES = ["recording", "text", "transfer", "incomplete"]
+DISPOSITIONS = ["no-answer", "congestion", "failed", "busy", "hung-up", "voicemail-no-message"]
+
+UUID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[1-8][0-9a-f]{3}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+RFC3339_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{3})?(Z|[+-]\d{2}:\d{2})$")
+VERSION_PATTERN = re.compile(r"^\d+\.\d+\.\d+$")
+
+def is_rfc3339(value):
+    """Whether a value is an RFC 3339 timestamp naming a real date and time."""
+    if not isinstance(value, str) or not RFC3339_PATTERN.match(value):
+        return False
+    try:
+        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    return True
+
+def is_index(value, length):
+    """Whether a value is a valid index into an array of the given length."""
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < length
+
+def has_content(obj):
+    """Whether an object carries inline (body/encoding) or external (url/content_hash) content."""
+    return bool((obj.get("body") and obj.get("encoding")) or (obj.get("url") and obj.get("content_hash")))
+
+def check_party_refs(refs, parties_count, where, errors):
+    """Check a party reference, or array of references, against the parties array."""
+    for i, ref in enumerate(refs if isinstance(refs, list) else [refs]):
+        if not isinstance(ref, int) or isinstance(ref, bool) or ref < 0:
+            errors.append(f"{where}: Invalid party index at position {i}")
+        elif ref >= parties_count:
+            errors.append(f"{where}: Party index {ref} exceeds parties array length")
+
+def validate_dialog(dialog, index, parties_count, errors, warnings):
+    """Validate one dialog object."""
+    where = f"Dialog {index}"
+    dialog_type = dialog.get("type")
+    if not dialog_type:
+        errors.append(f"{where}: Missing required 'type' field")
+    elif dialog_type not in DIALOG_TYPES:
+        errors.append(f"{where}: Invalid type '{dialog_type}' (must be one of: {', '.join(DIALOG_TYPES)})")
+
+    if not dialog.get("start"):
+        errors.append(f"{where}: Missing required 'start' field")
+    elif not is_rfc3339(dialog["start"]):
+        errors.append(f"{where}: 'start' must be RFC3339 date format")
+
+    parties = dialog.get("parties")
+    if parties is None:
+        errors.append(f"{where}: Missing required 'parties' field")
+    elif isinstance(parties, list) and not parties:
+        warnings.append(f"{where}: 'parties' array should not be empty")
+    else:
+        # A single index is allowed, and each entry may itself be a list of indices
+        refs = parties if isinstance(parties, list) else [parties]
+        for ref in refs:
+            check_party_refs(ref, parties_count, where, errors)
+
+    if "originator" in dialog:
+        check_party_refs(dialog["originator"], parties_count, f"{where} originator", errors)
+
+    duration = dialog.get("duration")
+    if duration is not None and (not isinstance(duration, (int, float)) or duration < 0):
+        errors.append(f"{where}: 'duration' must be a positive number")
+
+    if dialog_type in ("recording", "text") and not has_content(dialog):
+        warnings.append(f"{where}: Should contain either inline (body/encoding) or external (url/content_hash) content")
+
+    if dialog_type == "incomplete":
+        if not dialog.get("disposition"):
+            errors.append(f"{where}: 'disposition' is required for incomplete type")
+        elif dialog["disposition"] not in DISPOSITIONS:
+            errors.append(f"{where}: Invalid disposition '{dialog['disposition']}'")
+
+def validate_unsigned(vcon):
+    """Validate an unsigned vCon object.
+
+    Returns:
+        Tuple of (errors, warnings) lists
+    """
+    errors = []
+    warnings = []
+
+    version = vcon.get("vcon")
+    if not version:
+        errors.append('Missing required "vcon" version field')
+    elif version not in SUPPORTED_VERSIONS:
+        if isinstance(version, str) and VERSION_PATTERN.match(version):
+            warnings.append(f"vCon version {version} may not be fully supported (expected {CURRENT_VERSION})")
+        else:
+            errors.append(f"Invalid vCon version format: {version}")
+    elif version != CURRENT_VERSION:
+        warnings.append(f"vCon version {version} is valid but not current (latest: {CURRENT_VERSION})")
+
+    for field in ("uuid", "created_at", "parties"):
+        if not vcon.get(field):
+            errors.append(f"Missing required field: {field}")
+
+    if vcon.get("uuid") and not UUID_PATTERN.match(str(vcon["uuid"])):
+        warnings.append("UUID should be a valid UUID format")
+    for field in ("created_at", "updated_at"):
+        if vcon.get(field) and not is_rfc3339(vcon[field]):
+            errors.append(f"{field} must be in RFC3339 date format")
+
+    filled = [field for field in ("redacted", "appended", "group") if vcon.get(field)]
+    if len(filled) > 1:
+        errors.append(f"{', '.join(filled)} parameters are mutually exclusive and cannot all have values")
+
+    parties = vcon.get("parties") or []
+    if not isinstance(parties, list):
+        errors.append("parties must be an array")
+        parties = []
+    for index, party in enumerate(parties):
+        if not isinstance(party, dict):
+            errors.append(f"Party {index}: must be an object")
+        elif party.get("uuid") and not UUID_PATTERN.match(str(party["uuid"])):
+            errors.append(f"Party {index}: Invalid UUID format")
+
+    arrays = {}
+    for field in ("dialog", "analysis", "attachments"):
+        value = vcon.get(field, [])
+        if not isinstance(value, list):
+            errors.append(f"{field} must be an array")
+            value = []
+        arrays[field] = [item for item in value if isinstance(item, dict)]
+        if len(arrays[field]) != len(value):
+            errors.append(f"{field} entries must be objects")
+
+    dialogs_count = len(arrays["dialog"])
+    for index, dialog in enumerate(arrays["dialog"]):
+        validate_dialog(dialog, index, len(parties), errors, warnings)
+
+    for index, analysis in enumerate(arrays["analysis"]):
+        where = f"Analysis {index}"
+        if not analysis.get("type"):
+            errors.append(f"{where}: Missing required 'type' field")
+        refs = analysis.get("dialog")
+        if refs is not None:
+            for ref in refs if isinstance(refs, list) else [refs]:
+                if not is_index(ref, dialogs_count):
+                    errors.append(f"{where}: Dialog index {ref} is not a valid dialog reference")
+        if not has_content(analysis):
+            warnings.append(f"{where}: Should contain either inline (body/encoding) or external (url/content_hash) content")
+
+    for index, attachment in enumerate(arrays["attachments"]):
+        where = f"Attachment {index}"
+        if not attachment.get("type") and not attachment.get("purpose"):
+            warnings.append(f"{where}: Should have 'type' or 'purpose' field")
+        if attachment.get("start") and not is_rfc3339(attachment["start"]):
+            errors.append(f"{where}: 'start' must be RFC3339 date format")
+        if "party" in attachment:
+            check_party_refs(attachment["party"], len(parties), where, errors)
+        if "dialog" in attachment and not is_index(attachment["dialog"], dialogs_count):
+            errors.append(f"{where}: Dialog index {attachment['dialog']} is not a valid dialog reference")
+        if not has_content(attachment):
+            warnings.append(f"{where}: Should contain either inline (body/encoding) or external (url/content_hash) content")
+
+    return errors, warnings
+
+def validate_signed(doc):
+    """Validate a JWS general serialization and the vCon in its payload."""
+    errors = []
+    signatures = doc.get("signatures")
+    if not isinstance(signatures, list) or not signatures:
+        errors.append("Signed form: 'signatures' must be a non-empty array")
+    else:
+        for index, signature in enumerate(signatures):
+            if not isinstance(signature, dict):
+                errors.append(f"Signed form: signature {index} must be an object")
+                continue
+            for field in ("protected", "signature"):
+                if not isinstance(signature.get(field), str):
+                    errors.append(f"Signed form: signature {index} is missing '{field}'")
+
+    payload = doc.get("payload")
+    if not isinstance(payload, str):
+        errors.append("Signed form: 'payload' must be a base64url string")
+        return errors, []
+    try:
+        vcon = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError as e:
+        errors.append(f"Signed form: payload is not a JSON vCon ({e})")
+        return errors, []
+    if not isinstance(vcon, dict):
+        errors.append("Signed form: payload is not a JSON object")
+        return errors, []
+
+    payload_errors, warnings = validate_unsigned(vcon)
+    return errors + [f"Payload: {message}" for message in payload_errors], warnings
+
+def validate_encrypted(doc):
+    """Validate the shape of a JWE general serialization; its content is opaque."""
+    errors = []
+    for field in ("protected", "iv", "ciphertext", "tag"):
+        if not isinstance(doc.get(field), str):
+            errors.append(f"Encrypted form: '{field}' must be a base64url string")
+    recipients = doc.get("recipients")
+    if not isinstance(recipients, list) or not recipients:
+        errors.append("Encrypted form: 'recipients' must be a non-empty array")
+    else:
+        for index, recipient in enumerate(recipients):
+            if not isinstance(recipient, dict) or not isinstance(recipient.get("encrypted_key"), str):
+                errors.append(f"Encrypted form: recipient {index} is missing 'encrypted_key'")
+    return errors, []
+
+def validate_file(path):
+    """Validate one .vcon file.
+
+    Returns:
+        Report dict with name, form (unsigned, signed or encrypted), status
+        (good, warning or fail), errors and warnings
+    """
+    path = Path(path)
+    report = {"name": path.name, "form": None, "status": "fail", "errors": [], "warnings": []}
+    try:
+        doc = json.loads(path.read_bytes())
+    except ValueError as e:
+        report["errors"].append(f"Invalid JSON: {e}")
+        return report
+    if not isinstance(doc, dict):
+        report["errors"].append("Invalid vCon: top level must be a JSON object")
+        return report
+
+    if "ciphertext" in doc:
+        report["form"] = "encrypted"
+        errors, warnings = validate_encrypted(doc)
+    elif "payload" in doc and "signatures" in doc:
+        report["form"] = "signed"
+        errors, warnings = validate_signed(doc)
+    else:
+        report["form"] = "unsigned"
+        errors, warnings = validate_unsigned(doc)
+
+    report["errors"] = errors
+    report["warnings"] = warnings
+    report["status"] = "fail" if errors else ("warning" if warnings else "good")
+    return report
+
+def main():
+    files = sys.argv[1:] or sorted(str(path) for path in Path.cwd().glob("*.vcon"))
+    failed = 0
+    for file in files:
+        report = validate_file(file)
+        print(f"{report['status'].upper():8} {report['name']}")
+        for message in report["errors"]:
+            print(f"  error: {message}")
+        for message in report["warnings"]:
+            print(f"  warning: {message}")
+        failed += report["status"] == "fail"
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    exit(main())
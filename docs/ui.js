@@ -241,9 +241,9 @@ async function initializeExamples() {
         // Clear loading state
         examplesList.innerHTML = '';
         
-        // Create example items
-        examples.forEach(filename => {
-            const item = createExampleItem(filename);
+        // Create example items (entries are manifest objects, or plain filenames in older lists)
+        examples.forEach(entry => {
+            const item = createExampleItem(typeof entry === 'string' ? { name: entry } : entry);
             examplesList.appendChild(item);
         });
         
@@ -257,19 +257,21 @@ async function initializeExamples() {
     }
 }
 
-function createExampleItem(filename) {
+function createExampleItem(entry) {
+    const filename = entry.name;
     const item = document.createElement('div');
     item.className = 'example-item';
     
     // Parse filename to get a friendly name and type
     const name = filename.replace('.vcon', '').replace(/_/g, ' ');
     const type = getExampleType(filename);
+    const details = describeExample(entry);
     
     item.innerHTML = `
         <span class="example-icon"><img src="icons/20/solid/document.svg" alt="Document" width="20" height="20" class="icon-document"></span>
         <div class="example-content">
             <div class="example-name">${escapeHtml(name)}</div>
-            <div class="example-type">${escapeHtml(filename)}</div>
+            <div class="example-type">${escapeHtml(details ? `${filename} · ${details}` : filename)}</div>
         </div>
         ${type ? `<span class="example-badge">${escapeHtml(type)}</span>` : ''}
     `;
@@ -279,6 +281,16 @@ function createExampleItem(filename) {
     return item;
 }
 
+// Summary line from the list.json manifest, e.g. "2 parties · 1 dialog"
+function describeExample(entry) {
+    if (entry.encrypted) return 'encrypted';
+    if (entry.parties == null) return '';
+    
+    const parties = `${entry.parties} ${entry.parties === 1 ? 'party' : 'parties'}`;
+    const dialogs = `${entry.dialogs} ${entry.dialogs === 1 ? 'dialog' : 'dialogs'}`;
+    return `${parties} · ${dialogs}`;
+}
+
 function getExampleType(filename) {
     if (filename.includes('email')) return 'email';
     if (filename.includes('call')) return 'call';
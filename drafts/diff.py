@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Revision-to-revision diffs for the drafts mirror.
+
+Lines are interned to integer IDs, anchored on lines that occur exactly
+once in both revisions (patience diff), and the gaps between anchors are
+filled in with a linear-space Myers diff. Output is a unified diff whose
+hunk headers name the enclosing draft section, or a side-by-side HTML
+page grouped by section.
+"""
+
+import argparse
+import html
+import re
+import sys
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import revstore
+from sync import SECTION_HEADING
+
+# Where diffs of updated drafts are written after a sync
+DIFF_DIR = Path('diffs')
+
+# Unchanged lines shown around each change
+CONTEXT_LINES = 3
+
+# Edit distance after which a Myers search settles for a good-enough split
+# instead of the optimal one, bounding the cost on unrelated texts
+MAX_EDIT_COST = 256
+
+def intern_lines(a: Sequence, b: Sequence) -> Tuple[List[int], List[int]]:
+    """Map the lines of both sequences to small integer IDs."""
+    ids = {}
+    return ([ids.setdefault(line, len(ids)) for line in a],
+            [ids.setdefault(line, len(ids)) for line in b])
+
+def _unique_anchors(a: List[int], alo: int, ahi: int,
+                    b: List[int], blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """Longest increasing run of lines unique to both ranges (patience anchors)."""
+    counts = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, 0, i, 0])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+
+    pairs = sorted((entry[2], entry[3]) for entry in counts.values()
+                   if entry[0] == 1 and entry[1] == 1)
+    if not pairs:
+        return []
+
+    # Patience sorting: longest run of pairs increasing in both ranges
+    tails = []
+    tail_index = []
+    previous = [-1] * len(pairs)
+    for n, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(n)
+        else:
+            tails[pos] = j
+            tail_index[pos] = n
+        previous[n] = tail_index[pos - 1] if pos else -1
+
+    anchors = []
+    n = tail_index[-1]
+    while n != -1:
+        anchors.append(pairs[n])
+        n = previous[n]
+    anchors.reverse()
+    return anchors
+
+def _middle_snake(a: List[int], alo: int, ahi: int,
+                  b: List[int], blo: int, bhi: int) -> Tuple[int, int, int, int]:
+    """Find the middle snake of a shortest edit script (Myers, linear space).
+
+    Both ranges must be non-empty. Returns the snake as start and end
+    positions (x, y, u, v) relative to alo and blo. Past MAX_EDIT_COST the
+    search stops and splits at the furthest forward point reached, which
+    keeps the result correct but possibly longer than optimal.
+    """
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    best = (0, 0)
+    for d in range(max_d + 1):
+        if d > MAX_EDIT_COST and best[0] + best[1] > 0:
+            return best[0], best[1], best[0], best[1]
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if x <= n and 0 <= y <= m and x + y > best[0] + best[1]:
+                best = (x, y)
+            if odd and delta - (d - 1) <= k <= delta + (d - 1):
+                if x + backward[offset + delta - k] >= n:
+                    return x0, y0, x, y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d:
+                if x + forward[offset + delta - k] >= n:
+                    return n - x, m - y, n - x0, m - y0
+
+    raise AssertionError("no middle snake found")
+
+def matching_blocks(a: Sequence, b: Sequence) -> List[Tuple[int, int, int]]:
+    """Matching runs (i, j, size) between two line sequences.
+
+    Same shape as difflib.SequenceMatcher.get_matching_blocks(), including
+    the final (len(a), len(b), 0) sentinel.
+    """
+    a, b = intern_lines(a, b)
+    matches = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        # Common prefix and suffix never need searching
+        start = 0
+        while alo + start < ahi and blo + start < bhi and a[alo + start] == b[blo + start]:
+            start += 1
+        if start:
+            matches.append((alo, blo, start))
+            alo += start
+            blo += start
+        end = 0
+        while alo < ahi - end and blo < bhi - end and a[ahi - 1 - end] == b[bhi - 1 - end]:
+            end += 1
+        if end:
+            matches.append((ahi - end, bhi - end, end))
+            ahi -= end
+            bhi -= end
+
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if anchors:
+            i, j = alo, blo
+            for ai, bj in anchors:
+                matches.append((ai, bj, 1))
+                stack.append((i, ai, j, bj))
+                i, j = ai + 1, bj + 1
+            stack.append((i, ahi, j, bhi))
+            continue
+
+        x, y, u, v = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if u > x:
+            matches.append((alo + x, blo + y, u - x))
+        stack.append((alo, alo + x, blo, blo + y))
+        stack.append((alo + u, ahi, blo + v, bhi))
+
+    # Merge adjacent runs into maximal blocks
+    blocks = []
+    for i, j, size in sorted(matches):
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1][2] += size
+        else:
+            blocks.append([i, j, size])
+    blocks.append([len(a), len(b), 0])
+    return [tuple(block) for block in blocks]
+
+def opcodes(a: Sequence, b: Sequence) -> List[Tuple[str, int, int, int, int]]:
+    """Edit operations in difflib's get_opcodes() format."""
+    ops = []
+    i = j = 0
+    for bi, bj, size in matching_blocks(a, b):
+        if i < bi and j < bj:
+            ops.append(('replace', i, bi, j, bj))
+        elif i < bi:
+            ops.append(('delete', i, bi, j, bj))
+        elif j < bj:
+            ops.append(('insert', i, bi, j, bj))
+        if size:
+            ops.append(('equal', bi, bi + size, bj, bj + size))
+        i, j = bi + size, bj + size
+    return ops
+
+def grouped_opcodes(ops: List[Tuple[str, int, int, int, int]],
+                    context: int = CONTEXT_LINES) -> Iterator[List[Tuple[str, int, int, int, int]]]:
+    """Split opcodes into hunks with up to `context` lines of surrounding context."""
+    if not ops:
+        return
+    ops = list(ops)
+    tag, i1, i2, j1, j2 = ops[0]
+    if tag == 'equal':
+        ops[0] = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    tag, i1, i2, j1, j2 = ops[-1]
+    if tag == 'equal':
+        ops[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+
+    group = []
+    for tag, i1, i2, j1, j2 in ops:
+        if tag == 'equal' and i2 - i1 > 2 * context:
+            group.append((tag, i1, i1 + context, j1, j1 + context))
+            yield group
+            group = []
+            i1, j1 = i2 - context, j2 - context
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+def section_index(lines: List[str]) -> Tuple[List[int], List[str]]:
+    """Line numbers of section headings and their titles, in file order."""
+    starts = []
+    titles = []
+    for number, line in enumerate(lines):
+        match = SECTION_HEADING.match(line.rstrip())
+        if match:
+            starts.append(number)
+            titles.append(f"{match.group(1)} {match.group(2).strip()}")
+    return starts, titles
+
+def section_at(sections: Tuple[List[int], List[str]], line: int) -> str:
+    """Title of the section containing a line, or '' before the first heading."""
+    starts, titles = sections
+    pos = bisect_right(starts, line) - 1
+    return titles[pos] if pos >= 0 else ''
+
+def unified_diff(old_lines: List[str], new_lines: List[str], old_name: str, new_name: str,
+                 context: int = CONTEXT_LINES) -> Iterator[str]:
+    """Unified diff whose hunk headers name the enclosing section."""
+    sections = section_index(old_lines)
+    started = False
+    for group in grouped_opcodes(opcodes(old_lines, new_lines), context):
+        if not started:
+            yield f"--- {old_name}\n"
+            yield f"+++ {new_name}\n"
+            started = True
+        first, last = group[0], group[-1]
+        old_len = last[2] - first[1]
+        new_len = last[4] - first[3]
+        heading = section_at(sections, first[1])
+        yield (f"@@ -{first[1] + (1 if old_len else 0)},{old_len} "
+               f"+{first[3] + (1 if new_len else 0)},{new_len} @@"
+               f"{' ' + heading if heading else ''}\n")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in old_lines[i1:i2]:
+                    yield ' ' + line
+                continue
+            for line in old_lines[i1:i2]:
+                yield '-' + line
+            for line in new_lines[j1:j2]:
+                yield '+' + line
+
+HTML_STYLE = """
+body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 2rem; }
+h1 { font-size: 1.25rem; }
+table { border-collapse: collapse; width: 100%; table-layout: fixed; }
+td { font-family: ui-monospace, Menlo, Consolas, monospace; font-size: 12px;
+     white-space: pre-wrap; vertical-align: top; padding: 0 0.5rem; }
+td.num { width: 3.5rem; color: #888; text-align: right; user-select: none; }
+tr.section td { background: #eef2ff; font-weight: bold; padding: 0.4rem 0.5rem; }
+td.del { background: #fee2e2; }
+td.add { background: #dcfce7; }
+"""
+
+def side_by_side_html(old_lines: List[str], new_lines: List[str], old_name: str, new_name: str,
+                      context: int = CONTEXT_LINES) -> str:
+    """Side-by-side HTML diff with a heading row for each section touched."""
+    sections = section_index(old_lines)
+    rows = []
+
+    def cell(number: Optional[int], line: Optional[str], css: str) -> str:
+        if line is None:
+            return '<td class="num"></td><td></td>'
+        return (f'<td class="num">{number + 1}</td>'
+                f'<td class="{css}">{html.escape(line.rstrip())}</td>')
+
+    for group in grouped_opcodes(opcodes(old_lines, new_lines), context):
+        heading = section_at(sections, group[0][1]) or 'Front matter'
+        rows.append(f'<tr class="section"><td colspan="4">{html.escape(heading)}</td></tr>')
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for offset in range(i2 - i1):
+                    rows.append('<tr>' + cell(i1 + offset, old_lines[i1 + offset], '')
+                                + cell(j1 + offset, new_lines[j1 + offset], '') + '</tr>')
+                continue
+            for offset in range(max(i2 - i1, j2 - j1)):
+                i, j = i1 + offset, j1 + offset
+                rows.append('<tr>' + cell(i, old_lines[i] if i < i2 else None, 'del')
+                            + cell(j, new_lines[j] if j < j2 else None, 'add') + '</tr>')
+
+    body = '\n'.join(rows) or '<tr><td colspan="4">No changes</td></tr>'
+    title = f"{html.escape(old_name)} → {html.escape(new_name)}"
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>{HTML_STYLE}</style>
+</head>
+<body>
+<h1>{title}</h1>
+<table>
+{body}
+</table>
+</body>
+</html>
+"""
+
+def split_lines(data: bytes) -> List[str]:
+    """Decoded lines of a draft, split on newlines only and keeping them.
+
+    str.splitlines() would also break lines at the form feed that ends
+    every page of a .txt draft, throwing off line numbers.
+    """
+    lines = [line + b'\n' for line in data.split(b'\n')]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return [line.decode('utf-8', errors='replace') for line in lines]
+
+def read_lines(source: str) -> List[str]:
+    """Lines of a file path, or of a stored revision named like draft-NAME-NN."""
+    path = Path(source)
+    if path.exists():
+        data = path.read_bytes()
+    else:
+        match = re.match(r'^(.*)-(\d+)(?:\.txt)?$', path.name)
+        if not match:
+            raise FileNotFoundError(source)
+        data = revstore.read_revision(match.group(1), int(match.group(2)))
+    return split_lines(data)
+
+def render_diff(old_source: str, new_source: str, fmt: str = 'unified',
+                context: int = CONTEXT_LINES) -> str:
+    """Diff two revisions in the requested format ('unified' or 'html')."""
+    old_lines = read_lines(old_source)
+    new_lines = read_lines(new_source)
+    if fmt == 'html':
+        return side_by_side_html(old_lines, new_lines, old_source, new_source, context)
+    return ''.join(unified_diff(old_lines, new_lines, old_source, new_source, context))
+
+def _write_update_diff(draft_name: str, old_rev: int, new_rev: int, fmt: str) -> Path:
+    """Diff one updated draft into DIFF_DIR; runs in a worker process."""
+    extension = 'html' if fmt == 'html' else 'diff'
+    output = DIFF_DIR / f"{draft_name}-{old_rev:02d}-to-{new_rev:02d}.{extension}"
+    content = render_diff(f"{draft_name}-{old_rev:02d}", f"{draft_name}-{new_rev:02d}", fmt)
+    output.write_text(content, encoding='utf-8')
+    return output
+
+def diff_updates(updates: Dict[str, Tuple[int, int]], fmt: str = 'html',
+                 workers: Optional[int] = None) -> Dict[str, Path]:
+    """Diff every updated draft in parallel.
+
+    Args:
+        updates: Draft name mapped to (old revision, new revision)
+        fmt: 'html' or 'unified'
+        workers: Worker processes (default: one per CPU)
+
+    Returns:
+        Draft name mapped to the written diff file
+    """
+    if not updates:
+        return {}
+    DIFF_DIR.mkdir(exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(_write_update_diff, name, old, new, fmt)
+                   for name, (old, new) in updates.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description='Diff two draft revisions')
+    parser.add_argument('old', help='Old revision: a file path or a name like draft-ietf-vcon-vcon-core-00')
+    parser.add_argument('new', help='New revision, in the same form')
+    parser.add_argument('--format', choices=['unified', 'html'], default='unified',
+                        help='Unified diff or side-by-side HTML (default: unified)')
+    parser.add_argument('-U', '--context', type=int, default=CONTEXT_LINES,
+                        help=f'Lines of context (default: {CONTEXT_LINES})')
+    parser.add_argument('-o', '--output', type=Path, help='Write to a file instead of stdout')
+    args = parser.parse_args()
+
+    try:
+        content = render_diff(args.old, args.new, args.format, args.context)
+    except FileNotFoundError as e:
+        print(f"✗ Revision not found: {e}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        args.output.write_text(content, encoding='utf-8')
+        print(f"✓ Wrote {args.output}")
+    else:
+        sys.stdout.write(content)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
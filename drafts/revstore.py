@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Delta-compressed revision store for the drafts mirror.
+
+The newest revision of each draft stays in full as draft-NAME-NN.txt, so
+sync.py and the README keep working unchanged. Older revisions are stored
+in revisions/ as LZMA-compressed line deltas against that newest text and
+are rebuilt on demand. When a newer revision arrives, migrating re-bases
+the existing deltas onto it and folds the previous full text into a delta.
+"""
+
+import argparse
+import hashlib
+import json
+import lzma
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import diff
+
+STORE_DIR = Path('revisions')
+
+def full_path(draft_name: str, revision: int) -> Path:
+    """Path of a revision kept as plain text."""
+    return Path(f"{draft_name}-{revision:02d}.txt")
+
+def delta_path(draft_name: str, revision: int) -> Path:
+    """Path of a revision kept as a delta."""
+    return STORE_DIR / f"{draft_name}-{revision:02d}.delta.xz"
+
+def list_revisions(draft_name: str) -> Dict[int, str]:
+    """All stored revisions of a draft, mapped to 'full' or 'delta'."""
+    revisions = {}
+    pattern = re.compile(rf'^{re.escape(draft_name)}-(\d+)\.(txt|delta\.xz)$')
+    for directory in (Path('.'), STORE_DIR):
+        if not directory.is_dir():
+            continue
+        for path in directory.iterdir():
+            match = pattern.match(path.name)
+            if match:
+                kind = 'full' if match.group(2) == 'txt' else 'delta'
+                revisions.setdefault(int(match.group(1)), kind)
+    return revisions
+
+def read_lines(path: Path) -> List[bytes]:
+    """Read a file as a list of lines with their line endings."""
+    with open(path, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+def encode_delta(base_lines: List[bytes], target_lines: List[bytes]) -> List:
+    """Describe target as copies of base line ranges and inserted text.
+
+    Returns a list whose items are either [start, end] (copy base lines)
+    or a string (insert text, undecodable bytes kept via surrogateescape).
+    """
+    ops = []
+    for tag, i1, i2, j1, j2 in diff.opcodes(base_lines, target_lines):
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(b''.join(target_lines[j1:j2]).decode('utf-8', 'surrogateescape'))
+    return ops
+
+def write_delta(draft_name: str, revision: int, base_revision: int,
+                base_lines: List[bytes], target_lines: List[bytes]):
+    """Write a revision as a compressed delta against a base revision."""
+    data = b''.join(target_lines)
+    record = {
+        'base': base_revision,
+        'base_sha256': hashlib.sha256(b''.join(base_lines)).hexdigest(),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'size': len(data),
+        'ops': encode_delta(base_lines, target_lines),
+    }
+
+    STORE_DIR.mkdir(exist_ok=True)
+    path = delta_path(draft_name, revision)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with lzma.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+
+def load_delta(draft_name: str, revision: int) -> Dict:
+    """Load a delta record."""
+    with lzma.open(delta_path(draft_name, revision), 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def iter_revision(draft_name: str, revision: int) -> Iterator[bytes]:
+    """Stream the bytes of any stored revision.
+
+    Full revisions are read in chunks; delta revisions are rebuilt op by
+    op from the base text without materializing the result. The rebuilt
+    content is checked against its recorded hash once fully produced.
+
+    Raises:
+        FileNotFoundError: If the revision is not stored
+        ValueError: If a delta no longer matches its base or its hash
+    """
+    path = full_path(draft_name, revision)
+    if path.exists():
+        with open(path, 'rb') as f:
+            yield from iter(lambda: f.read(65536), b'')
+        return
+
+    record = load_delta(draft_name, revision)
+    base_lines = read_lines(full_path(draft_name, record['base']))
+    if hashlib.sha256(b''.join(base_lines)).hexdigest() != record['base_sha256']:
+        raise ValueError(f"Base of {draft_name}-{revision:02d} has changed")
+
+    digest = hashlib.sha256()
+    for op in record['ops']:
+        if isinstance(op, str):
+            chunk = op.encode('utf-8', 'surrogateescape')
+        else:
+            chunk = b''.join(base_lines[op[0]:op[1]])
+        digest.update(chunk)
+        yield chunk
+
+    if digest.hexdigest() != record['sha256']:
+        raise ValueError(f"Rebuilt {draft_name}-{revision:02d} does not match its hash")
+
+def read_revision(draft_name: str, revision: int) -> bytes:
+    """Read the full bytes of any stored revision."""
+    return b''.join(iter_revision(draft_name, revision))
+
+def migrate_draft(draft_name: str) -> Tuple[int, int]:
+    """Keep only the newest revision in full and delta-encode the rest.
+
+    Existing deltas against an older base are re-based onto the newest
+    revision first, while their base is still on disk. Each new delta is
+    verified by rebuilding it before the full text, or the delta it
+    replaces, is removed.
+
+    Returns:
+        Number of revisions converted and bytes saved
+    """
+    revisions = list_revisions(draft_name)
+    if not revisions:
+        return 0, 0
+    newest = max(revisions)
+    if revisions[newest] != 'full':
+        raise ValueError(f"Newest revision of {draft_name} is not stored in full")
+    newest_lines = read_lines(full_path(draft_name, newest))
+
+    converted = 0
+    saved = 0
+    for revision, kind in sorted(revisions.items()):
+        if revision == newest:
+            continue
+
+        if kind == 'delta':
+            if load_delta(draft_name, revision)['base'] == newest:
+                continue
+            target_lines = b''.join(iter_revision(draft_name, revision)).splitlines(keepends=True)
+            path = delta_path(draft_name, revision)
+            old_size = path.stat().st_size
+            # Keep the old delta until the re-based one has round-tripped
+            backup_path = path.with_name(f"{path.name}.old")
+            os.replace(path, backup_path)
+            try:
+                write_delta(draft_name, revision, newest, newest_lines, target_lines)
+                if read_revision(draft_name, revision) != b''.join(target_lines):
+                    raise ValueError(f"Re-based delta for {draft_name}-{revision:02d} did not round-trip")
+            except BaseException:
+                os.replace(backup_path, path)
+                raise
+            backup_path.unlink()
+            saved += old_size - path.stat().st_size
+            continue
+
+        path = full_path(draft_name, revision)
+        target_lines = read_lines(path)
+        write_delta(draft_name, revision, newest, newest_lines, target_lines)
+        if read_revision(draft_name, revision) != b''.join(target_lines):
+            delta_path(draft_name, revision).unlink()
+            raise ValueError(f"Delta for {path} did not round-trip")
+        saved += path.stat().st_size - delta_path(draft_name, revision).stat().st_size
+        path.unlink()
+        converted += 1
+
+    return converted, saved
+
+def stored_drafts() -> List[str]:
+    """Names of all drafts with at least one stored revision."""
+    names = set()
+    pattern = re.compile(r'^(.*)-\d+\.(?:txt|delta\.xz)$')
+    for directory in (Path('.'), STORE_DIR):
+        if directory.is_dir():
+            for path in directory.iterdir():
+                match = pattern.match(path.name)
+                if match:
+                    names.add(match.group(1))
+    return sorted(names)
+
+def migrate_all() -> Tuple[int, int]:
+    """Migrate every draft in the mirror; returns revisions converted and bytes saved."""
+    converted = saved = 0
+    for draft_name in stored_drafts():
+        count, size = migrate_draft(draft_name)
+        converted += count
+        saved += size
+    return converted, saved
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description='Delta-compressed store for older draft revisions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('migrate', help='Delta-encode every revision but the newest')
+    subparsers.add_parser('list', help='List stored revisions')
+    cat_parser = subparsers.add_parser('cat', help='Write a revision to stdout')
+    cat_parser.add_argument('draft', help='Draft name, e.g. draft-ietf-vcon-vcon-core')
+    cat_parser.add_argument('revision', type=int, help='Revision number')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        converted, saved = migrate_all()
+        print(f"✓ Converted {converted} revision(s), saved {saved / 1024:.1f} KB")
+    elif args.command == 'list':
+        for draft_name in stored_drafts():
+            revisions = list_revisions(draft_name)
+            listed = ', '.join(f"{rev:02d}{'' if kind == 'full' else ' (delta)'}"
+                               for rev, kind in sorted(revisions.items()))
+            print(f"{draft_name}: {listed}")
+    elif args.command == 'cat':
+        try:
+            for chunk in iter_revision(args.draft, args.revision):
+                sys.stdout.buffer.write(chunk)
+        except FileNotFoundError:
+            print(f"✗ {args.draft}-{args.revision:02d} is not stored", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Full-text search over the drafts mirror.
+
+Builds an inverted index (term → draft revision, section, line) in a
+SQLite file next to the drafts. Every revision is indexed, whether kept
+in full or as a delta in the revision store, and only revisions whose
+files changed since the last update are re-read. A lookup is one B-tree
+range scan per term, so queries stay fast as the mirror grows.
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import revstore
+from diff import section_index, split_lines
+
+SEARCH_INDEX_FILE = '.search-index.sqlite'
+
+# Words, keeping underscores so field names like content_hash stay whole
+TOKEN = re.compile(r'[a-z0-9][a-z0-9_]*')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    draft TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    sections TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    lines BLOB NOT NULL,
+    PRIMARY KEY (term_id, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+"""
+
+def open_index(path: str = SEARCH_INDEX_FILE) -> sqlite3.Connection:
+    """Open the search index, creating it if needed."""
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def stored_revisions() -> Dict[str, Tuple[str, int, Path]]:
+    """Every stored revision, mapped to (draft, revision, backing file)."""
+    revisions = {}
+    for draft_name in revstore.stored_drafts():
+        for revision, kind in revstore.list_revisions(draft_name).items():
+            if kind == 'full':
+                path = revstore.full_path(draft_name, revision)
+            else:
+                path = revstore.delta_path(draft_name, revision)
+            revisions[f"{draft_name}-{revision:02d}"] = (draft_name, revision, path)
+    return revisions
+
+def tokenize(line: str) -> Iterator[str]:
+    """Lowercased search terms in a line."""
+    return iter(TOKEN.findall(line.lower()))
+
+def index_revision(conn: sqlite3.Connection, name: str, draft_name: str,
+                   revision: int, path: Path):
+    """Add one revision's postings to the index."""
+    lines = split_lines(revstore.read_revision(draft_name, revision))
+    starts, titles = section_index(lines)
+
+    # Each posting is a (section + 1, line) pair; section 0 is the front matter
+    postings = {}
+    for number, line in enumerate(lines):
+        terms = set(tokenize(line))
+        if not terms:
+            continue
+        section = bisect_right(starts, number)
+        for term in terms:
+            postings.setdefault(term, array('I')).extend((section, number))
+
+    stat = path.stat()
+    sections = [[start, title] for start, title in zip(starts, titles)]
+    doc_id = conn.execute(
+        "INSERT INTO docs (name, draft, revision, size, mtime, sections) VALUES (?, ?, ?, ?, ?, ?)",
+        (name, draft_name, revision, stat.st_size, stat.st_mtime_ns, json.dumps(sections))
+    ).lastrowid
+
+    conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)",
+                     ((term,) for term in postings))
+    term_ids = {}
+    for term in postings:
+        term_ids[term] = conn.execute("SELECT id FROM terms WHERE term = ?", (term,)).fetchone()[0]
+    conn.executemany("INSERT INTO postings (term_id, doc_id, lines) VALUES (?, ?, ?)",
+                     ((term_ids[term], doc_id, positions.tobytes())
+                      for term, positions in postings.items()))
+
+def remove_revision(conn: sqlite3.Connection, doc_id: int):
+    """Drop one revision and its postings from the index."""
+    conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+    conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+def update_index(path: str = SEARCH_INDEX_FILE) -> Tuple[int, int]:
+    """Bring the index in line with the mirror.
+
+    Revisions whose backing file kept its size and mtime are skipped;
+    new or changed ones are re-indexed and vanished ones removed, all in
+    one transaction.
+
+    Returns:
+        Number of revisions indexed and removed
+    """
+    conn = open_index(path)
+    revisions = stored_revisions()
+    indexed = removed = 0
+    with conn:
+        known = {name: (doc_id, size, mtime) for doc_id, name, size, mtime
+                 in conn.execute("SELECT id, name, size, mtime FROM docs")}
+        for name, (doc_id, size, mtime) in known.items():
+            current = revisions.get(name)
+            if current is not None:
+                stat = current[2].stat()
+                if stat.st_size == size and stat.st_mtime_ns == mtime:
+                    del revisions[name]
+                    continue
+            remove_revision(conn, doc_id)
+            if current is None:
+                removed += 1
+
+        for name, (draft_name, revision, file_path) in sorted(revisions.items()):
+            index_revision(conn, name, draft_name, revision, file_path)
+            indexed += 1
+    conn.close()
+    return indexed, removed
+
+def term_postings(conn: sqlite3.Connection, term: str) -> Dict[int, List[Tuple[int, int]]]:
+    """Postings for a term, or for every term with a prefix if it ends in '*'."""
+    if term.endswith('*'):
+        prefix = term[:-1]
+        rows = conn.execute(
+            "SELECT p.doc_id, p.lines FROM terms t JOIN postings p ON p.term_id = t.id "
+            "WHERE t.term >= ? AND t.term < ?", (prefix, prefix + '\uffff'))
+    else:
+        rows = conn.execute(
+            "SELECT p.doc_id, p.lines FROM terms t JOIN postings p ON p.term_id = t.id "
+            "WHERE t.term = ?", (term,))
+
+    postings = {}
+    for doc_id, blob in rows:
+        positions = array('I')
+        positions.frombytes(blob)
+        postings.setdefault(doc_id, []).extend(zip(positions[::2], positions[1::2]))
+    return postings
+
+def query_terms(terms: List[str]) -> List[str]:
+    """Split query terms the way lines are tokenized, keeping a trailing '*'.
+
+    'vcon-core' becomes 'vcon' and 'core', matching what the index holds.
+    """
+    tokens = []
+    for term in terms:
+        parts = list(tokenize(term.rstrip('*')))
+        if parts and term.endswith('*'):
+            parts[-1] += '*'
+        tokens.extend(parts)
+    return tokens
+
+def search(conn: sqlite3.Connection, terms: List[str],
+           all_revisions: bool = False) -> List[Dict]:
+    """Find the sections that contain every query term.
+
+    Args:
+        conn: Open search index
+        terms: Query terms; a trailing '*' matches any term with that prefix
+        all_revisions: Search every stored revision, not just the newest
+
+    Returns:
+        Hits ordered by draft, revision and line, each with the draft,
+        revision, section title and line number (1-based)
+    """
+    terms = query_terms(terms)
+    if not terms:
+        return []
+    matched = None
+    lines = {}
+    for term in terms:
+        sections = set()
+        for doc_id, positions in term_postings(conn, term).items():
+            for section, line in positions:
+                sections.add((doc_id, section))
+                lines.setdefault((doc_id, section), set()).add(line)
+        matched = sections if matched is None else matched & sections
+        if not matched:
+            return []
+
+    docs = {}
+    for doc_id in {doc_id for doc_id, _ in matched}:
+        name, draft_name, revision, sections = conn.execute(
+            "SELECT name, draft, revision, sections FROM docs WHERE id = ?", (doc_id,)).fetchone()
+        docs[doc_id] = (name, draft_name, revision, json.loads(sections))
+    if not all_revisions:
+        # Newest across every indexed revision, not just the matching ones,
+        # so superseded revisions never answer for a draft
+        newest = dict(conn.execute("SELECT draft, MAX(revision) FROM docs GROUP BY draft"))
+        docs = {doc_id: doc for doc_id, doc in docs.items() if doc[2] == newest[doc[1]]}
+
+    hits = []
+    for doc_id, section in matched:
+        if doc_id not in docs:
+            continue
+        name, draft_name, revision, sections = docs[doc_id]
+        title = sections[section - 1][1] if section else 'Front matter'
+        for line in lines[(doc_id, section)]:
+            hits.append({'name': name, 'draft': draft_name, 'revision': revision,
+                         'section': title, 'line': line + 1})
+    hits.sort(key=lambda hit: (hit['draft'], hit['revision'], hit['line']))
+    return hits
+
+def main():
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description='Search the drafts mirror')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('update', help='Index new and changed revisions')
+    query_parser = subparsers.add_parser('query', help='Find sections containing every term')
+    query_parser.add_argument('terms', nargs='+', help="Search terms; 'term*' matches a prefix")
+    query_parser.add_argument('--all-revisions', action='store_true',
+                              help='Search older revisions too')
+    query_parser.add_argument('--json', action='store_true', help='Print hits as JSON')
+    args = parser.parse_args()
+
+    if args.command == 'update' or not os.path.exists(SEARCH_INDEX_FILE):
+        indexed, removed = update_index()
+        if args.command == 'update':
+            print(f"✓ Indexed {indexed} revision(s), removed {removed}")
+            return 0
+
+    conn = open_index()
+    hits = search(conn, args.terms, args.all_revisions)
+    conn.close()
+
+    if args.json:
+        print(json.dumps(hits, indent=2))
+        return 0
+
+    text = {}
+    for hit in hits:
+        if hit['name'] not in text:
+            data = revstore.read_revision(hit['draft'], hit['revision'])
+            text[hit['name']] = split_lines(data)
+        line = text[hit['name']][hit['line'] - 1].strip()
+        print(f"{hit['name']}:{hit['line']}  [{hit['section']}]  {line}")
+    print(f"\n{len(hits)} hit(s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
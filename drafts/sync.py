@@ -1,10 +1,46 @@
 #!/usr/bin/env python3
+import argparse
+import hashlib
+import json
 import os
 import re
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+PUBLIC_ARCHIVE_URL = "https://www.ietf.org/archive/id"
+
+# Where drafts are fetched from; override to use a mirror or a local stand-in
+ARCHIVE_URL = os.getenv('IETF_ARCHIVE_URL', PUBLIC_ARCHIVE_URL)
+
+# Validators and local fingerprints remembered between runs; used by
+# --discovery index and --verify, not by the default revision probes
+SYNC_STATE_FILE = '.sync-state.json'
+
+# Parsed draft metadata, keyed by filename and invalidated by size + mtime
+DRAFT_INDEX_FILE = '.draft-index.json'
+
+# Header patterns for the first page of a plaintext draft
+HEADER_AUTHOR = re.compile(r'^[A-Z]\.(?:\s?[A-Z]\.?)*\s+\S.*$')
+HEADER_DATE = re.compile(r'^(?:\d{1,2}\s+)?(?:January|February|March|April|May|June|July|'
+                         r'August|September|October|November|December)\s+\d{4}$')
+SECTION_HEADING = re.compile(r'^((?:\d+\.)+\d*|Appendix [A-Z]\.?)\s+(\S.*)$')
+
+# A draft file entry in the archive's directory listing
+INDEX_ENTRY = re.compile(r'([A-Za-z0-9._-]+)-(\d{2,})\.txt')
+
+# Concurrent revision probes; also the size of the shared connection pool
+MAX_WORKERS = 8
+
+def make_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    """Create a session whose keep-alive pool can serve every worker at once."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 def extract_draft_info(filename: str) -> Tuple[str, int]:
     """Extract draft name and revision number from filename."""
     match = re.match(r'(.*)-(\d+)\.txt$', filename)
@@ -23,76 +59,312 @@ def get_existing_drafts() -> Dict[str, int]:
                 drafts[name] = rev
     return drafts
 
-def check_revision_exists(draft_name: str, revision: int) -> bool:
+def check_revision_exists(session: requests.Session, draft_name: str, revision: int) -> bool:
     """Check if a specific revision exists on the IETF server."""
-    url = f"https://www.ietf.org/archive/id/{draft_name}-{revision:02d}.txt"
+    url = f"{ARCHIVE_URL}/{draft_name}-{revision:02d}.txt"
     try:
-        response = requests.head(url, timeout=10)
+        response = session.head(url, timeout=10)
         return response.status_code == 200
     except requests.RequestException:
         return False
 
-def download_revision(draft_name: str, revision: int) -> bool:
+def load_sync_state() -> Dict:
+    """Load the sync state manifest, or start a fresh one."""
+    try:
+        with open(SYNC_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state.setdefault('index', {})
+    state.setdefault('drafts', {})
+    return state
+
+def save_sync_state(state: Dict):
+    """Write the sync state manifest atomically."""
+    tmp_file = f"{SYNC_STATE_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, SYNC_STATE_FILE)
+
+def file_fingerprint(filename: str) -> Dict:
+    """Size, mtime and SHA-256 of a local file."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+def local_file_unchanged(filename: str, entry: Dict) -> bool:
+    """Whether a file still matches its recorded fingerprint, judged by stat alone."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return False
+    return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime')
+
+def conditional_headers(entry: Dict) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers from recorded validators."""
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+def record_revision(state: Dict, draft_name: str, revision: int,
+                    response: requests.Response, filename: str):
+    """Remember a revision's server validators and local fingerprint."""
+    state['drafts'][draft_name] = {
+        'revision': revision,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        **file_fingerprint(filename),
+    }
+
+def download_revision(session: requests.Session, draft_name: str, revision: int,
+                      state: Dict = None) -> bool:
     """Download a specific revision."""
     filename = f"{draft_name}-{revision:02d}.txt"
-    url = f"https://www.ietf.org/archive/id/{filename}"
+    url = f"{ARCHIVE_URL}/{filename}"
     
     try:
-        response = requests.get(url, timeout=30)
+        response = session.get(url, timeout=30)
         response.raise_for_status()
         
         with open(filename, 'w', encoding='utf-8') as f:
             f.write(response.text)
         
+        if state is not None:
+            record_revision(state, draft_name, revision, response, filename)
+        
         print(f"  ✓ Downloaded {filename}")
         return True
     except requests.RequestException as e:
         print(f"  ✗ Failed to download {filename}: {e}")
         return False
 
-def find_latest_revision(draft_name: str, current_rev: int) -> int:
-    """Find the latest available revision for a draft."""
-    print(f"Checking {draft_name} (currently have rev {current_rev:02d})...")
+def revalidate_revision(session: requests.Session, state: Dict,
+                        draft_name: str, revision: int) -> str:
+    """Confirm a local revision matches the server with a conditional request.
     
-    # Start checking from current + 1
-    check_rev = current_rev + 1
+    When the local file's size and mtime match the manifest, its recorded
+    validators are sent and a 304 confirms it without reading the file.
+    Otherwise the file is re-fetched and rewritten only if its content
+    differs from the server's.
+    
+    Returns:
+        'unchanged', 'updated' or 'failed'
+    """
+    filename = f"{draft_name}-{revision:02d}.txt"
+    entry = state['drafts'].get(draft_name, {})
+    trusted = entry.get('revision') == revision and local_file_unchanged(filename, entry)
+    
+    try:
+        response = session.get(f"{ARCHIVE_URL}/{filename}", timeout=30,
+                               headers=conditional_headers(entry) if trusted else {})
+        if response.status_code == 304:
+            return 'unchanged'
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"  ✗ Failed to revalidate {filename}: {e}")
+        return 'failed'
+    
+    local_hash = entry.get('sha256') if trusted else None
+    if local_hash is None and os.path.exists(filename):
+        local_hash = file_fingerprint(filename)['sha256']
+    
+    result = 'unchanged'
+    if hashlib.sha256(response.text.encode('utf-8')).hexdigest() != local_hash:
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        result = 'updated'
+    
+    record_revision(state, draft_name, revision, response, filename)
+    return result
+
+def revalidate_revisions(session: requests.Session, state: Dict,
+                         drafts: Dict[str, int]) -> Dict[str, str]:
+    """Revalidate the current revision of every draft concurrently."""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(lambda item: revalidate_revision(session, state, *item),
+                               drafts.items())
+        return dict(zip(drafts, results))
+
+def find_latest_revision(session: requests.Session, draft_name: str, current_rev: int) -> int:
+    """Find the latest available revision for a draft.
+    
+    Revisions are published in sequence, so existence is monotonic: probe
+    current+1, +2, +4, ... until one is missing, then binary search the
+    gap. This needs O(log n) requests for n new revisions, and a single
+    request in the common case of no update.
+    """
     latest_found = current_rev
+    step = 1
+    
+    # Gallop until we overshoot
+    while check_revision_exists(session, draft_name, current_rev + step):
+        latest_found = current_rev + step
+        step *= 2
+    missing = current_rev + step
     
-    while True:
-        print(f"  Checking revision {check_rev:02d}...", end=' ')
-        if check_revision_exists(draft_name, check_rev):
-            print("exists")
-            latest_found = check_rev
-            check_rev += 1
+    # Binary search between the newest hit and the first miss
+    while missing - latest_found > 1:
+        middle = (latest_found + missing) // 2
+        if check_revision_exists(session, draft_name, middle):
+            latest_found = middle
         else:
-            print("not found")
-            break
+            missing = middle
     
     return latest_found
 
-def extract_draft_title(filename: str) -> str:
-    """Extract the title from an IETF draft file."""
+def find_latest_revisions(session: requests.Session, drafts: Dict[str, int]) -> Dict[str, int]:
+    """Find the latest revision of every draft, probing drafts concurrently."""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        latest = executor.map(lambda item: find_latest_revision(session, *item), drafts.items())
+        return dict(zip(drafts, latest))
+
+def find_latest_revisions_from_index(session: requests.Session, drafts: Dict[str, int],
+                                     state: Dict = None) -> Dict[str, int]:
+    """Find the latest revision of every draft from one archive listing.
+    
+    The archive's directory index is streamed line by line, so the whole
+    listing is never held in memory, and every tracked draft is resolved
+    in the same single pass. With a sync state, the listing is requested
+    conditionally and a 304 reuses the revisions found last time.
+    """
+    index_state = state['index'] if state is not None else {}
+    known = index_state.get('drafts', {})
+    headers = {}
+    if all(name in known for name in drafts):
+        headers = conditional_headers(index_state)
+    
+    latest = dict(drafts)
+    
+    with session.get(f"{ARCHIVE_URL}/", stream=True, timeout=120,
+                     headers=headers) as response:
+        if response.status_code == 304:
+            return {name: max(rev, known[name]) for name, rev in drafts.items()}
+        response.raise_for_status()
+        response.encoding = response.encoding or 'utf-8'
+        for line in response.iter_lines(decode_unicode=True):
+            for match in INDEX_ENTRY.finditer(line):
+                name, rev = match.group(1), int(match.group(2))
+                if name in latest and rev > latest[name]:
+                    latest[name] = rev
+    
+    if state is not None:
+        state['index'] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'drafts': latest,
+        }
+    return latest
+
+def parse_draft_metadata(filename: str) -> Dict:
+    """Parse title, authors, date, abstract and section offsets from a draft.
+    
+    The file is streamed line by line. Header fields come from the first
+    page only; the rest of the file is scanned just for section headings,
+    whose byte offsets are recorded so a section can be read directly.
+    """
+    meta = {'title': None, 'authors': [], 'date': None, 'abstract': '', 'sections': []}
+    first_page = True
+    in_header = True
+    in_abstract = False
+    previous_blank = False
+    abstract = []
+    offset = 0
+    
+    with open(filename, 'rb') as f:
+        for raw in f:
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            line_offset = offset
+            offset += len(raw)
+            
+            if '\f' in line:
+                first_page = False
+            
+            if first_page:
+                blank = not line.strip()
+                if in_header and blank and (meta['authors'] or meta['date']):
+                    in_header = False
+                elif in_header and not blank:
+                    # Right-hand column: authors, their organizations, then the date
+                    match = re.match(r'^(?:\S.*?)?\s{2,}(\S.*)$', line)
+                    right = match.group(1).strip() if match else ''
+                    if HEADER_DATE.match(right):
+                        meta['date'] = right
+                    elif HEADER_AUTHOR.match(right):
+                        meta['authors'].append(right)
+                elif meta['title'] is None and previous_blank and re.match(r'^\s+\S', line):
+                    meta['title'] = line.strip()
+                elif line.strip() == 'Abstract':
+                    in_abstract = True
+                elif in_abstract and line and not line[0].isspace():
+                    in_abstract = False
+                elif in_abstract and not blank:
+                    abstract.append(line.strip())
+                previous_blank = blank
+                continue
+            
+            match = SECTION_HEADING.match(line)
+            if match:
+                meta['sections'].append([match.group(1).rstrip('.'), match.group(2).strip(),
+                                         line_offset])
+    
+    meta['abstract'] = ' '.join(abstract)
+    return meta
+
+def load_draft_index() -> Dict:
+    """Load the draft metadata index, or start an empty one."""
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Look for the first indented line that follows a whitespace-only line
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            # Check if current line has leading whitespace and actual content
-            if re.match(r'^\s+\S', line):
-                # Check if previous line exists and is whitespace-only
-                if i > 0 and re.match(r'^\s*$', lines[i-1]):
-                    return line.strip()
-                
-    except (IOError, UnicodeDecodeError) as e:
+        with open(DRAFT_INDEX_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_draft_index(index: Dict):
+    """Write the draft metadata index atomically, dropping removed files."""
+    index = {name: entry for name, entry in index.items() if os.path.exists(name)}
+    tmp_file = f"{DRAFT_INDEX_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, DRAFT_INDEX_FILE)
+
+def draft_metadata(index: Dict, filename: str) -> Dict:
+    """Metadata for a draft, re-parsed only if its size or mtime changed."""
+    stat = os.stat(filename)
+    entry = index.get(filename)
+    if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+        entry = parse_draft_metadata(filename)
+        entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+        index[filename] = entry
+    return entry
+
+def extract_draft_title(filename: str, index: Dict = None) -> str:
+    """Extract the title from an IETF draft file.
+    
+    With a metadata index the title is read from it, and the file is only
+    parsed when it is new or has changed.
+    """
+    title = None
+    try:
+        if index is not None:
+            title = draft_metadata(index, filename)['title']
+        else:
+            title = parse_draft_metadata(filename)['title']
+    except OSError as e:
         print(f"  ⚠ Could not read {filename}: {e}")
     
+    if title:
+        return title
+    
     # Fallback to filename-based title
     draft_name = filename.replace('.txt', '').replace('draft-', '')
     return draft_name.replace('-', ' ').title()
 
-def generate_readme(draft_info: Dict[str, int]):
+def generate_readme(draft_info: Dict[str, int], index: Dict = None):
     """Generate README.md with links to all drafts."""
     readme_content = """# VCON Draft Documents
 
@@ -108,10 +380,10 @@ This directory contains the latest revisions of VCON-related IETF drafts.
     for draft_name in sorted(draft_info.keys()):
         revision = draft_info[draft_name]
         filename = f"{draft_name}-{revision:02d}.txt"
-        ietf_url = f"https://www.ietf.org/archive/id/{filename}"
+        ietf_url = f"{PUBLIC_ARCHIVE_URL}/{filename}"
         
-        # Extract actual title from the draft file
-        title = extract_draft_title(filename)
+        # Extract actual title from the draft metadata
+        title = extract_draft_title(filename, index)
         
         readme_content += f"| {title} | {revision:02d} | [{filename}]({ietf_url}) |\n"
     
@@ -133,6 +405,15 @@ The sync script will:
 - Download any updates found
 - Preserve older revisions
 - Update this README with the latest information
+
+With `--diff`, a side-by-side HTML diff of each updated draft is written
+to `diffs/`; `python3 diff.py <old> <new>` diffs any two revisions.
+
+`python3 search.py query <term>...` finds the sections mentioning every
+term; once built, the index is kept up to date by each sync.
+
+With `--store`, older revisions are kept as compressed deltas in
+`revisions/`; rebuild one with `python3 revstore.py cat <draft> <rev>`.
 """
     
     with open('README.md', 'w', encoding='utf-8') as f:
@@ -142,6 +423,31 @@ The sync script will:
 
 def main():
     """Main sync process."""
+    global ARCHIVE_URL
+    
+    parser = argparse.ArgumentParser(
+        description='Sync VCON drafts to their latest revisions',
+        epilog='By default each draft is checked with a HEAD probe for its next revision; '
+               'a missing revision has no validators, so these probes are never conditional. '
+               'Stored ETag/Last-Modified validators are only sent with --discovery index, '
+               'where an unchanged listing skips every draft, and with --verify.')
+    parser.add_argument('--discovery', choices=['probe', 'index'], default='probe',
+                        help='Find new revisions by probing each draft, or from one '
+                             'bulk archive listing, requested conditionally (default: probe)')
+    parser.add_argument('--archive-url', default=ARCHIVE_URL,
+                        help=f'Draft archive base URL (default: {ARCHIVE_URL})')
+    parser.add_argument('--verify', action='store_true',
+                        help='Revalidate local copies of current revisions with '
+                             'conditional requests')
+    parser.add_argument('--diff', choices=['html', 'unified'], nargs='?', const='html',
+                        help='Write a diff of each updated draft to diffs/ '
+                             '(default format: html)')
+    parser.add_argument('--store', action='store_true',
+                        help='Keep older revisions as compressed deltas against the '
+                             'newest one (see revstore.py)')
+    args = parser.parse_args()
+    ARCHIVE_URL = args.archive_url.rstrip('/')
+    
     print("🔄 Starting VCON draft synchronization...\n")
     
     # Get existing drafts
@@ -149,9 +455,10 @@ def main():
     print(f"Found {len(existing_drafts)} existing drafts:")
     
     # Print existing drafts with their titles
+    index = load_draft_index()
     for draft_name, revision in existing_drafts.items():
         filename = f"{draft_name}-{revision:02d}.txt"
-        title = extract_draft_title(filename)
+        title = extract_draft_title(filename, index)
         print(f"  • {title} (rev {revision:02d})")
     print()
     
@@ -159,22 +466,50 @@ def main():
         print("No existing drafts found. Please run fetch.sh first or manually add some draft files.")
         return
     
-    updated_drafts = {}
+    session = make_session()
+    state = load_sync_state()
+    
     total_updates = 0
     
-    # Check each draft for updates
+    if args.verify:
+        print(f"Revalidating {len(existing_drafts)} local drafts...")
+        results = revalidate_revisions(session, state, existing_drafts)
+        for draft_name, result in sorted(results.items()):
+            if result == 'updated':
+                print(f"  📥 Refreshed {draft_name}-{existing_drafts[draft_name]:02d}.txt")
+                total_updates += 1
+        print(f"  ✓ {list(results.values()).count('unchanged')} unchanged\n")
+    
+    latest_revisions = None
+    if args.discovery == 'index':
+        print(f"Reading archive index for {len(existing_drafts)} drafts...\n")
+        try:
+            latest_revisions = find_latest_revisions_from_index(session, existing_drafts, state)
+        except requests.RequestException as e:
+            print(f"  ⚠ Could not read archive index ({e}), probing instead\n")
+    
+    if latest_revisions is None:
+        # Probe every draft for new revisions at once
+        print(f"Checking {len(existing_drafts)} drafts for new revisions...\n")
+        latest_revisions = find_latest_revisions(session, existing_drafts)
+    
+    updated_drafts = {}
+    new_revisions = {}
+    
+    # Download any updates found
     for draft_name, current_rev in existing_drafts.items():
         filename = f"{draft_name}-{current_rev:02d}.txt"
-        title = extract_draft_title(filename)
+        title = extract_draft_title(filename, index)
         print(f"Checking {title}...")
         print(f"  Current revision: {current_rev:02d}")
         
-        latest_rev = find_latest_revision(draft_name, current_rev)
+        latest_rev = latest_revisions[draft_name]
         
         if latest_rev > current_rev:
             print(f"  📥 Updating from {current_rev:02d} to {latest_rev:02d}")
-            if download_revision(draft_name, latest_rev):
+            if download_revision(session, draft_name, latest_rev, state):
                 total_updates += 1
+                new_revisions[draft_name] = (current_rev, latest_rev)
             updated_drafts[draft_name] = latest_rev
         else:
             print(f"  ✓ Already have latest revision ({current_rev:02d})")
@@ -182,8 +517,29 @@ def main():
         
         print()  # Empty line for readability
     
+    save_sync_state(state)
+    
+    if args.diff and new_revisions:
+        import diff
+        print(f"Diffing {len(new_revisions)} updated drafts...")
+        for draft_name, path in sorted(diff.diff_updates(new_revisions, args.diff).items()):
+            print(f"  ✓ {path}")
+        print()
+    
+    if args.store:
+        import revstore
+        converted, saved = revstore.migrate_all()
+        print(f"🗜  Delta-compressed {converted} older revision(s), saved {saved / 1024:.1f} KB\n")
+    
     # Generate updated README
-    generate_readme(updated_drafts)
+    generate_readme(updated_drafts, index)
+    save_draft_index(index)
+    
+    # Keep an existing search index in step with the mirror
+    import search
+    if os.path.exists(search.SEARCH_INDEX_FILE):
+        indexed, removed = search.update_index()
+        print(f"✓ Search index updated ({indexed} indexed, {removed} removed)")
     
     # Summary
     print(f"🎉 Synchronization complete!")
@@ -0,0 +1,1065 @@
+#!/usr/bin/env python3
+"""
+vCon Zip Bundle (.vconz) Tools
+
+Builds vCon Zip Bundles as specified in vconz.md: the original vCons under
+vcons/[uuid].json and every externally referenced file, verified against
+its content_hash, under files/[content-hash].[ext]. Bundles are read in
+place through a memory map, without extracting them, and validated
+against the Bundle Validation rules on a process pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path, PurePosixPath
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from verify_media import (HASH_ALGORITHMS, MediaVerifier, b64url, external_refs,
+                          parse_content_hash, primary_hash)
+
+BUNDLE_FORMAT = 'vcon-bundle'
+BUNDLE_VERSION = '1.0'
+MANIFEST_NAME = 'manifest.json'
+FILES_DIR = 'files/'
+VCONS_DIR = 'vcons/'
+
+# Fixed member timestamp, so bundles do not record when they were built
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Media types from the vCon core spec, and common aliases, that mimetypes
+# does not map (or maps to an unexpected extension)
+MEDIA_EXTENSIONS = {
+    'audio/x-wav': '.wav',
+    'audio/wav': '.wav',
+    'audio/x-mp3': '.mp3',
+    'audio/mpeg': '.mp3',
+    'audio/x-mp4': '.m4a',
+    'audio/ogg': '.ogg',
+    'video/x-mp4': '.mp4',
+    'video/mp4': '.mp4',
+    'video/ogg': '.ogv',
+    'text/plain': '.txt',
+    'application/json': '.json',
+    'application/vcon+json': '.json',
+    'application/pdf': '.pdf',
+    'multipart/mixed': '.eml',
+    'message/rfc822': '.eml',
+}
+
+# (offset, signature, extension) for content analysis of a file header
+MAGIC_EXTENSIONS = [
+    (8, b'WAVE', '.wav'),
+    (0, b'ID3', '.mp3'),
+    (0, b'\xff\xfb', '.mp3'),
+    (0, b'OggS', '.ogg'),
+    (0, b'fLaC', '.flac'),
+    (4, b'ftyp', '.mp4'),
+    (0, b'%PDF', '.pdf'),
+    (0, b'\x89PNG', '.png'),
+    (0, b'\xff\xd8\xff', '.jpg'),
+    (0, b'GIF8', '.gif'),
+    (0, b'{', '.json'),
+    (0, b'[', '.json'),
+]
+
+# Media that is already compressed gains nothing from deflate, and stored
+# members can be read straight out of the archive
+STORED_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.ogg', '.ogv', '.mp4', '.flac',
+                     '.png', '.jpg', '.gif', '.pdf', '.bin'}
+
+
+def decode_security_form(doc: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """Classify a vCon by security form and find its readable content.
+
+    Args:
+        doc: Parsed vCon file
+
+    Returns:
+        Tuple of form ('unsigned', 'signed' or 'encrypted'), the unsigned
+        vCon (None if encrypted) and the vCon UUID (None if absent)
+
+    Raises:
+        ValueError: If the vCon, or a JWS payload, is not a JSON object
+    """
+    if not isinstance(doc, dict):
+        raise ValueError('vCon is not a JSON object')
+    if 'ciphertext' in doc:
+        unprotected = doc.get('unprotected') if isinstance(doc.get('unprotected'), dict) else {}
+        return 'encrypted', None, unprotected.get('uuid')
+    if 'payload' in doc and 'signatures' in doc:
+        payload = doc['payload']
+        vcon = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        if not isinstance(vcon, dict):
+            raise ValueError('JWS payload is not a JSON object')
+        return 'signed', vcon, vcon.get('uuid')
+    return 'unsigned', doc, doc.get('uuid')
+
+
+def security_form_errors(doc: Dict[str, Any]) -> List[str]:
+    """Check that a signed (JWS) or encrypted (JWE) vCon is structurally intact.
+
+    Args:
+        doc: Parsed vCon file
+
+    Returns:
+        Problems found; empty for intact and unsigned vCons
+    """
+    errors = []
+    if 'ciphertext' in doc:
+        for field in ('protected', 'iv', 'ciphertext', 'tag'):
+            if not isinstance(doc.get(field), str):
+                errors.append(f"JWE '{field}' must be a base64url string")
+        recipients = doc.get('recipients')
+        if not isinstance(recipients, list) or not recipients:
+            errors.append("JWE 'recipients' must be a non-empty array")
+        else:
+            for index, recipient in enumerate(recipients):
+                if not isinstance(recipient, dict) or not isinstance(recipient.get('encrypted_key'), str):
+                    errors.append(f"JWE recipient {index} is missing 'encrypted_key'")
+    elif 'payload' in doc or 'signatures' in doc:
+        if not isinstance(doc.get('payload'), str):
+            errors.append("JWS 'payload' must be a base64url string")
+        signatures = doc.get('signatures')
+        if not isinstance(signatures, list) or not signatures:
+            errors.append("JWS 'signatures' must be a non-empty array")
+        else:
+            for index, signature in enumerate(signatures):
+                if not isinstance(signature, dict):
+                    errors.append(f"JWS signature {index} must be an object")
+                    continue
+                for field in ('protected', 'signature'):
+                    if not isinstance(signature.get(field), str):
+                        errors.append(f"JWS signature {index} is missing '{field}'")
+    return errors
+
+
+def extension_for(mediatype: Optional[str], head: bytes, url: str) -> str:
+    """Determine a bundled file's extension (vconz.md, Extension Determination).
+
+    Args:
+        mediatype: The vCon mediatype/mimetype field, if any
+        head: The first bytes of the file
+        url: The URL the file was referenced by
+
+    Returns:
+        Extension including the leading dot
+    """
+    if mediatype:
+        base_type = mediatype.split(';')[0].strip().lower()
+        extension = MEDIA_EXTENSIONS.get(base_type) or mimetypes.guess_extension(base_type)
+        if extension:
+            return extension
+
+    for offset, signature, extension in MAGIC_EXTENSIONS:
+        if head[offset:offset + len(signature)] == signature:
+            return extension
+
+    suffix = PurePosixPath(urlparse(url).path).suffix.lower()
+    if 1 < len(suffix) <= 6 and suffix[1:].isalnum():
+        return suffix
+
+    return '.bin'
+
+
+def file_member_name(content_hash: str, extension: str) -> str:
+    """Archive path of a bundled file."""
+    return f"{FILES_DIR}{content_hash}{extension}"
+
+
+class BundleBuilder:
+    """Streaming vCon Zip Bundle writer.
+
+    vCons are collected with add_vcon() and written by build(). Each
+    distinct file, identified by its primary content hash, is resolved
+    once however many vCons reference it. Resolution runs on a thread
+    pool; every chunk is fed to all of the file's hash algorithms in the
+    same pass that reads it (hashlib releases the GIL, so hashing uses
+    all cores). Files are copied into the archive in chunks as soon as
+    they are verified, so no file is ever held in memory.
+    """
+
+    COPY_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, verifier: MediaVerifier, jobs: int = 16,
+                 spool_dir: Optional[Path] = None):
+        """Initialize the builder.
+
+        Args:
+            verifier: Fetches and hashes referenced files
+            jobs: Maximum files resolved concurrently
+            spool_dir: Directory for downloads awaiting their turn to be
+                written (default: system temp directory)
+        """
+        self.verifier = verifier
+        self.jobs = jobs
+        self.spool_dir = spool_dir
+        self.vcons: Dict[str, Dict[str, Any]] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.errors: List[Dict[str, Any]] = []
+        self.warnings: List[Dict[str, Any]] = []
+
+    def add_vcon(self, path: Path) -> bool:
+        """Add a vCon file to the bundle.
+
+        The file is stored byte for byte, whatever its security form.
+        Signed vCons are scanned through their payload; encrypted vCons
+        are included without resolving their references.
+
+        Args:
+            path: Path to the .vcon file
+
+        Returns:
+            True if the vCon was added
+        """
+        try:
+            data = path.read_bytes()
+            doc = json.loads(data)
+            problems = security_form_errors(doc)
+            if problems:
+                raise ValueError('; '.join(problems))
+            form, vcon, uuid = decode_security_form(doc)
+        except (OSError, ValueError, AttributeError) as e:
+            self.errors.append({'vcon': str(path), 'error': f"Could not read vCon: {e}"})
+            return False
+
+        if not uuid:
+            self.errors.append({'vcon': str(path), 'error': 'vCon has no uuid to name it by'})
+            return False
+
+        existing = self.vcons.get(uuid)
+        if existing is not None:
+            if existing['data'] != data:
+                self.errors.append({'vcon': str(path), 'error': f"Duplicate vCon UUID {uuid} "
+                                                                 f"(also in {existing['path']})"})
+                return False
+            return True
+
+        self.vcons[uuid] = {'path': str(path), 'data': data, 'form': form}
+        if vcon is None:
+            self.warnings.append({'vcon': str(path), 'warning': 'Encrypted; external references '
+                                                                  'were not resolved'})
+            return True
+
+        for ref in external_refs(vcon):
+            if not ref['hashes']:
+                self.warnings.append({'vcon': str(path), 'location': ref['location'],
+                                      'warning': 'External reference without content_hash'})
+                continue
+            algorithm, digest = primary_hash(ref['hashes'])
+            entry = self.files.setdefault(f"{algorithm}-{digest}",
+                                          {'hashes': [], 'urls': [], 'mediatype': None, 'refs': []})
+            entry['hashes'].extend(h for h in ref['hashes'] if h not in entry['hashes'])
+            if ref['url'] not in entry['urls']:
+                entry['urls'].append(ref['url'])
+            entry['mediatype'] = entry['mediatype'] or ref['mediatype']
+            entry['refs'].append({'vcon': str(path), 'location': ref['location']})
+        return True
+
+    def _resolve(self, content_hash: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Fetch, hash and verify one file, trying each URL it is served from.
+
+        Local (file://) files are hashed in place; remote files are
+        downloaded to a spool file in the same pass that hashes them.
+
+        Returns:
+            Dict with the source 'path', 'size', 'extension', whether the
+            path is a 'spooled' temporary file, or an 'error'
+        """
+        algorithms = [name for name, _ in entry['hashes']]
+        unsupported = [name for name in algorithms if name not in HASH_ALGORITHMS]
+        if unsupported:
+            return {'error': f"Unsupported hash algorithm: {', '.join(unsupported)}"}
+
+        error = None
+        for url in entry['urls']:
+            # URLs come from untrusted vCon content, so only HTTPS is
+            # followed unless the operator maps them with --base-url
+            if not self.verifier.base_url and urlparse(url).scheme != 'https':
+                error = f"Not an HTTPS URL: {url}"
+                self.warnings.append({'file': content_hash, 'warning': f"Rejected non-HTTPS URL {url}"})
+                continue
+            resolved = self.verifier.resolve_url(url)
+
+            spool = None
+            try:
+                if resolved.startswith('file://'):
+                    path = Path(url2pathname(urlparse(resolved).path))
+                    fetched = self.verifier.fetch_digests(resolved, algorithms)
+                else:
+                    spool = tempfile.NamedTemporaryFile(dir=self.spool_dir, prefix='vconz-',
+                                                        delete=False)
+                    with spool:
+                        fetched = self.verifier.fetch_digests(resolved, algorithms, sink=spool)
+                    path = Path(spool.name)
+            except OSError as e:
+                if spool is not None:
+                    os.unlink(spool.name)
+                error = f"{url}: {e}"
+                continue
+
+            mismatched = [name for name, digest in entry['hashes']
+                          if fetched['digests'][name] != digest]
+            if mismatched:
+                if spool is not None:
+                    os.unlink(spool.name)
+                error = f"{url}: {', '.join(mismatched)} does not match content_hash"
+                continue
+
+            with open(path, 'rb') as f:
+                head = f.read(16)
+            return {'path': path, 'size': fetched['received'], 'spooled': spool is not None,
+                    'extension': extension_for(entry['mediatype'], head, url)}
+
+        return {'error': error}
+
+    def _write_member(self, bundle: zipfile.ZipFile, name: str, source: Path, size: int) -> None:
+        """Copy a file into the bundle in chunks."""
+        info = zipfile.ZipInfo(name, ZIP_EPOCH)
+        extension = PurePosixPath(name).suffix
+        info.compress_type = (zipfile.ZIP_STORED if extension in STORED_EXTENSIONS
+                              else zipfile.ZIP_DEFLATED)
+        info.file_size = size
+        with open(source, 'rb') as src, bundle.open(info, 'w') as dst:
+            shutil.copyfileobj(src, dst, self.COPY_CHUNK_SIZE)
+
+    def _write_bytes(self, bundle: zipfile.ZipFile, name: str, data: bytes) -> None:
+        """Write a small JSON member to the bundle."""
+        info = zipfile.ZipInfo(name, ZIP_EPOCH)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        bundle.writestr(info, data)
+
+    def build(self, output: Path, keep_going: bool = False) -> Dict[str, Any]:
+        """Resolve every referenced file and write the bundle.
+
+        The bundle is written to a temporary file next to the output and
+        renamed into place only if the build succeeds.
+
+        Args:
+            output: Path of the .vconz file
+            keep_going: Write the bundle even if some vCons or files could
+                not be added, leaving those out
+
+        Returns:
+            Build report with counts, 'errors' and 'warnings'
+        """
+        start = time.monotonic()
+        report = {'output': str(output), 'vcons': len(self.vcons), 'files': 0,
+                  'references': sum(len(entry['refs']) for entry in self.files.values()),
+                  'bytes': 0, 'errors': self.errors, 'warnings': self.warnings}
+
+        if self.errors and not keep_going:
+            report['ok'] = False
+            return report
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output.with_name(f".{output.name}.part")
+        failed = False
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', allowZip64=True) as bundle:
+                manifest = {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION}
+                self._write_bytes(bundle, MANIFEST_NAME, json.dumps(manifest, indent=2).encode())
+                for uuid, vcon in sorted(self.vcons.items()):
+                    self._write_bytes(bundle, f"{VCONS_DIR}{uuid}.json", vcon['data'])
+
+                with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                    futures = {executor.submit(self._resolve, content_hash, entry): content_hash
+                               for content_hash, entry in self.files.items()}
+                    for future in as_completed(futures):
+                        if future.cancelled():
+                            continue
+                        content_hash = futures[future]
+                        result = future.result()
+                        if 'error' in result:
+                            self.errors.append({'file': content_hash, 'error': result['error'],
+                                                'refs': self.files[content_hash]['refs']})
+                            if not keep_going:
+                                failed = True
+                                for pending in futures:
+                                    pending.cancel()
+                            continue
+                        try:
+                            if not failed:
+                                self._write_member(
+                                    bundle, file_member_name(content_hash, result['extension']),
+                                    result['path'], result['size'])
+                                report['files'] += 1
+                                report['bytes'] += result['size']
+                        finally:
+                            if result['spooled']:
+                                os.unlink(result['path'])
+
+            if failed:
+                tmp_path.unlink()
+            else:
+                os.replace(tmp_path, output)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        report['ok'] = not failed
+        report['seconds'] = round(time.monotonic() - start, 3)
+        return report
+
+
+class BundleReader:
+    """Random-access reader for a vCon Zip Bundle.
+
+    The bundle is memory-mapped and its central directory is parsed once
+    into an index of member data offsets, which is cached in a sidecar
+    file (bundle.vconz.idx) and reused while the bundle's size and mtime
+    are unchanged. With the index cached, opening a bundle reads nothing
+    from it, and fetching a member touches only that member's pages.
+    Stored members are returned as zero-copy memoryviews of the mapping;
+    release them before closing the reader.
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, path: Path, cache_index: bool = True):
+        """Open a bundle.
+
+        Args:
+            path: Path to the .vconz file
+            cache_index: Read and write the sidecar index
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_name(f"{self.path.name}.idx")
+        self._file = open(self.path, 'rb')
+        try:
+            stat = os.fstat(self._file.fileno())
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+
+        self.members = self._load_index(stat) if cache_index else None
+        if self.members is None:
+            self.members = self._build_index()
+            if cache_index:
+                self._save_index(stat)
+
+        self.vcon_names: Dict[str, str] = {}
+        self.file_names: Dict[str, str] = {}
+        for name in self.members:
+            if name.startswith(VCONS_DIR) and name.endswith('.json'):
+                self.vcon_names[name[len(VCONS_DIR):-len('.json')]] = name
+            elif name.startswith(FILES_DIR):
+                stem = name[len(FILES_DIR):]
+                self.file_names[stem.split('.', 1)[0]] = name
+
+    def _load_index(self, stat: os.stat_result) -> Optional[Dict[str, List[int]]]:
+        """Load the sidecar index if it matches the bundle."""
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(index, dict) or index.get('version') != self.INDEX_VERSION
+                or index.get('size') != stat.st_size or index.get('mtime') != stat.st_mtime_ns):
+            return None
+        return index['members']
+
+    def _save_index(self, stat: os.stat_result) -> None:
+        """Write the sidecar index; a read-only location just means no cache."""
+        index = {'version': self.INDEX_VERSION, 'size': stat.st_size,
+                 'mtime': stat.st_mtime_ns, 'members': self.members}
+        tmp_path = self.index_path.with_name(f".{self.index_path.name}.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f, separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def _build_index(self) -> Dict[str, List[int]]:
+        """Parse the central directory into member name -> [data offset,
+        compress type, compressed size, size, CRC-32]."""
+        members = {}
+        with zipfile.ZipFile(self._file) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if info.flag_bits & 0x1:
+                    raise zipfile.BadZipFile(f"{info.filename}: encrypted ZIP members are not supported")
+                # The local header's extra field may differ from the central one
+                header = self._map[info.header_offset:info.header_offset + zipfile.sizeFileHeader]
+                if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+                    raise zipfile.BadZipFile(f"{info.filename}: bad local file header")
+                name_length, extra_length = struct.unpack_from('<HH', header, 26)
+                offset = info.header_offset + zipfile.sizeFileHeader + name_length + extra_length
+                if offset + info.compress_size > len(self._map):
+                    raise zipfile.BadZipFile(f"{info.filename}: data runs past the end of the bundle")
+                members[info.filename] = [offset, info.compress_type, info.compress_size,
+                                          info.file_size, info.CRC]
+        return members
+
+    def close(self) -> None:
+        """Unmap and close the bundle."""
+        try:
+            self._map.close()
+        except BufferError:
+            # Views of stored members are still alive; the mapping is
+            # released when the last of them is
+            pass
+        self._file.close()
+
+    def __enter__(self) -> BundleReader:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read(self, name: str) -> Union[memoryview, bytes]:
+        """Read a member by archive path.
+
+        Returns:
+            A memoryview into the mapping for stored members, or the
+            decompressed bytes for deflated ones
+        """
+        offset, compress_type, compress_size, file_size, _ = self.members[name]
+        data = memoryview(self._map)[offset:offset + compress_size]
+        if compress_type == zipfile.ZIP_STORED:
+            return data
+        if compress_type != zipfile.ZIP_DEFLATED:
+            raise zipfile.BadZipFile(f"{name}: unsupported compression method {compress_type}")
+        return zlib.decompress(data, -zlib.MAX_WBITS, file_size)
+
+    def iter_chunks(self, name: str, chunk_size: int = 1024 * 1024) -> Iterator[Union[memoryview, bytes]]:
+        """Stream a member in chunks without materializing it."""
+        offset, compress_type, compress_size, _, _ = self.members[name]
+        data = memoryview(self._map)[offset:offset + compress_size]
+        if compress_type == zipfile.ZIP_STORED:
+            for start in range(0, compress_size, chunk_size):
+                yield data[start:start + chunk_size]
+            return
+        if compress_type != zipfile.ZIP_DEFLATED:
+            raise zipfile.BadZipFile(f"{name}: unsupported compression method {compress_type}")
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        for start in range(0, compress_size, chunk_size):
+            chunk = decompressor.decompress(data[start:start + chunk_size])
+            if chunk:
+                yield chunk
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+    def manifest(self) -> Dict[str, Any]:
+        """The parsed manifest.json."""
+        return json.loads(bytes(self.read(MANIFEST_NAME)))
+
+    def uuids(self) -> List[str]:
+        """UUIDs of the bundled vCons."""
+        return sorted(self.vcon_names)
+
+    def vcon_bytes(self, uuid: str) -> bytes:
+        """The original bytes of a vCon, in whatever security form it was bundled."""
+        return bytes(self.read(self.vcon_names[uuid]))
+
+    def vcon(self, uuid: str) -> Dict[str, Any]:
+        """A parsed vCon, as stored (signed and encrypted forms included)."""
+        return json.loads(self.vcon_bytes(uuid))
+
+    def file_name(self, content_hash: Any) -> Optional[str]:
+        """Find the member for a content_hash value (vconz.md, File Lookup Mechanism).
+
+        Args:
+            content_hash: A content_hash field value, a single string or
+                a list; every listed hash is tried
+
+        Returns:
+            Archive path of the file, or None if it is not bundled
+        """
+        for algorithm, digest in parse_content_hash(content_hash):
+            name = self.file_names.get(f"{algorithm}-{digest}")
+            if name is not None:
+                return name
+        return None
+
+    def file(self, content_hash: Any) -> Union[memoryview, bytes]:
+        """Read a referenced file by its content_hash value."""
+        name = self.file_name(content_hash)
+        if name is None:
+            raise KeyError(f"No file in bundle for content_hash {content_hash}")
+        return self.read(name)
+
+    def references(self, uuid: str) -> List[Dict[str, Any]]:
+        """External references of a vCon, each with the bundled file's
+        archive path in 'member' (None if missing). Encrypted vCons have
+        no readable references.
+
+        Raises:
+            ValueError: If the vCon is not valid JSON, or is not (or does
+                not sign) a JSON object
+        """
+        _, vcon, _ = decode_security_form(self.vcon(uuid))
+        if vcon is None:
+            return []
+        refs = external_refs(vcon)
+        for ref in refs:
+            ref['member'] = self.file_name([f"{name}-{digest}" for name, digest in ref['hashes']])
+        return refs
+
+
+FILE_MEMBER = re.compile(r'^files/([a-z0-9]+)-([A-Za-z0-9_-]+)\.([A-Za-z0-9]+)$')
+VCON_MEMBER = re.compile(r'^vcons/([^/]+)\.json$')
+TOP_LEVEL = (MANIFEST_NAME, FILES_DIR, VCONS_DIR, 'extensions/')
+
+# Reader opened once in each validation worker process
+_worker_reader: Optional[BundleReader] = None
+
+
+def _init_worker(path: str) -> None:
+    """Open the bundle in a validation worker."""
+    global _worker_reader
+    _worker_reader = BundleReader(Path(path))
+
+
+def _check_vcon(name: str) -> Dict[str, Any]:
+    """Check one bundled vCon and collect its references (runs in a worker).
+
+    Returns:
+        Dict with the member name, uuid, form, 'refs' and 'groups' found,
+        and any 'errors' (code, message)
+    """
+    result = {'member': name, 'uuid': None, 'form': None, 'refs': [], 'groups': [], 'errors': []}
+    data = bytes(_worker_reader.read(name))
+    if zlib.crc32(data) != _worker_reader.members[name][4]:
+        result['errors'].append(('crc-mismatch', 'Member data does not match its ZIP CRC-32'))
+        return result
+
+    try:
+        doc = json.loads(data)
+        if not isinstance(doc, dict):
+            raise ValueError('top level must be a JSON object')
+    except ValueError as e:
+        result['errors'].append(('invalid-json', f"Invalid vCon JSON: {e}"))
+        return result
+
+    problems = security_form_errors(doc)
+    if problems:
+        result['errors'].extend(('malformed-security-form', problem) for problem in problems)
+        return result
+    try:
+        result['form'], vcon, result['uuid'] = decode_security_form(doc)
+    except (ValueError, TypeError) as e:
+        result['errors'].append(('malformed-security-form', f"Unreadable JWS payload: {e}"))
+        return result
+
+    expected = VCON_MEMBER.match(name).group(1)
+    if not result['uuid']:
+        result['errors'].append(('missing-uuid', 'vCon has no uuid'))
+    elif str(result['uuid']).lower() != expected.lower():
+        result['errors'].append(('uuid-mismatch', f"vCon uuid {result['uuid']} does not match its filename"))
+
+    if vcon is not None:
+        result['refs'] = external_refs(vcon)
+        groups = vcon.get('group')
+        for index, group in enumerate(groups if isinstance(groups, list) else []):
+            if isinstance(group, dict) and group.get('uuid'):
+                result['groups'].append({'location': f"group[{index}]", 'uuid': str(group['uuid'])})
+    return result
+
+
+def _hash_member(name: str, algorithms: List[str]) -> Dict[str, Any]:
+    """Hash a member straight from the mapped archive (runs in a worker).
+
+    Returns:
+        Dict with the member name, size, base64url 'digests' and whether
+        the ZIP CRC-32 matched
+    """
+    hashers = {algorithm: hashlib.new(HASH_ALGORITHMS[algorithm]) for algorithm in algorithms}
+    crc = 0
+    size = 0
+    for chunk in _worker_reader.iter_chunks(name):
+        for hasher in hashers.values():
+            hasher.update(chunk)
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        if isinstance(chunk, memoryview):
+            chunk.release()
+    return {'member': name, 'size': size, 'crc_ok': crc == _worker_reader.members[name][4],
+            'digests': {algorithm: b64url(hasher.digest()) for algorithm, hasher in hashers.items()}}
+
+
+class BundleValidator:
+    """Checks a bundle against the Bundle Validation rules of vconz.md.
+
+    Validation runs in three stages, each on the whole bundle:
+
+    1. structure: the ZIP, manifest.json and member names. Errors here
+       stop validation, since nothing after can be trusted.
+    2. vcons: each vCon parses, keeps an intact security form and is
+       named by its uuid; its references resolve to bundled files.
+    3. files: every file is hashed with its filename's algorithm and all
+       algorithms referenced for it, and compared.
+
+    Stages 2 and 3 run on a process pool whose workers read members
+    straight from their own memory map of the bundle. Every problem is
+    reported with a code and the member (and vCon location) it concerns.
+    """
+
+    def __init__(self, path: Path, jobs: Optional[int] = None, verify_hashes: bool = True,
+                 fail_fast: bool = False):
+        """Initialize the validator.
+
+        Args:
+            path: Path to the .vconz file
+            jobs: Worker processes (default: CPU count)
+            verify_hashes: Hash every file; without it, stage 3 is skipped
+            fail_fast: Stop after the first stage that finds errors
+        """
+        self.path = Path(path)
+        self.jobs = jobs or os.cpu_count() or 4
+        self.verify_hashes = verify_hashes
+        self.fail_fast = fail_fast
+        self.errors: List[Dict[str, Any]] = []
+        self.warnings: List[Dict[str, Any]] = []
+        self.summary = {'vcons': 0, 'files': 0, 'references': 0, 'bytes_hashed': 0}
+
+    def _error(self, code: str, message: str, member: Optional[str] = None, **details) -> None:
+        self.errors.append({'code': code, 'member': member, 'message': message, **details})
+
+    def _warning(self, code: str, message: str, member: Optional[str] = None, **details) -> None:
+        self.warnings.append({'code': code, 'member': member, 'message': message, **details})
+
+    def _check_structure(self, reader: BundleReader) -> None:
+        """Stage 1: manifest, member names and duplicates."""
+        with zipfile.ZipFile(self.path) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        seen = set()
+        for name in names:
+            if name in seen:
+                self._error('duplicate-member', 'Member appears more than once in the archive', name)
+            seen.add(name)
+
+        if MANIFEST_NAME not in reader.members:
+            self._error('manifest-missing', 'Bundle has no manifest.json')
+        else:
+            try:
+                manifest = reader.manifest()
+                if not isinstance(manifest, dict):
+                    raise ValueError('top level must be a JSON object')
+            except ValueError as e:
+                self._error('manifest-invalid', f"manifest.json is not valid JSON: {e}", MANIFEST_NAME)
+            else:
+                if manifest.get('format') != BUNDLE_FORMAT:
+                    self._error('manifest-invalid', f"format must be \"{BUNDLE_FORMAT}\"", MANIFEST_NAME)
+                if not isinstance(manifest.get('version'), str):
+                    self._error('manifest-invalid', 'version is required', MANIFEST_NAME)
+                elif manifest['version'] != BUNDLE_VERSION:
+                    self._warning('manifest-version', f"Bundle version {manifest['version']} "
+                                                      f"(this validator knows {BUNDLE_VERSION})", MANIFEST_NAME)
+
+        uuids = {}
+        for name in reader.members:
+            if name.startswith(FILES_DIR):
+                match = FILE_MEMBER.match(name)
+                if not match:
+                    self._error('bad-file-name', 'Files must be named [hash-algorithm]-[base64url-hash].[extension]', name)
+                elif match.group(1) not in HASH_ALGORITHMS:
+                    self._error('unsupported-algorithm', f"Unsupported hash algorithm {match.group(1)}", name)
+                elif len(match.group(2)) != len(b64url(bytes(hashlib.new(HASH_ALGORITHMS[match.group(1)]).digest_size))):
+                    self._error('bad-file-name', f"Not a {match.group(1)} digest", name)
+            elif name.startswith(VCONS_DIR):
+                match = VCON_MEMBER.match(name)
+                if not match:
+                    self._error('bad-vcon-name', 'vCons must be named vcons/[uuid].json', name)
+                    continue
+                key = match.group(1).lower()
+                if key in uuids:
+                    self._error('duplicate-uuid', f"Same UUID as {uuids[key]}", name)
+                uuids[key] = name
+            elif not name.startswith(TOP_LEVEL):
+                self._warning('unknown-member', 'Not part of the bundle layout', name)
+
+        if not reader.vcon_names:
+            self._error('no-vcons', 'Bundle contains no vCons')
+
+    def _check_vcons(self, reader: BundleReader, executor: ProcessPoolExecutor) -> Dict[str, List[Dict[str, Any]]]:
+        """Stage 2: check every vCon and resolve its references.
+
+        Returns:
+            File member -> expected hashes, each with the referencing
+            vCon member and location
+        """
+        expected: Dict[str, List[Dict[str, Any]]] = {}
+        names = [name for name in reader.vcon_names.values() if VCON_MEMBER.match(name)]
+        chunksize = max(1, min(256, len(names) // (self.jobs * 4)))
+        bundled_uuids = {uuid.lower() for uuid in reader.vcon_names}
+        for result in executor.map(_check_vcon, names, chunksize=chunksize):
+            self.summary['vcons'] += 1
+            member = result['member']
+            for code, message in result['errors']:
+                self._error(code, message, member)
+            if result['form'] == 'encrypted':
+                self._warning('encrypted', 'Encrypted; references cannot be checked', member)
+
+            for group in result['groups']:
+                if group['uuid'].lower() not in bundled_uuids:
+                    self._warning('missing-group-vcon', f"Group references vCon {group['uuid']}, "
+                                                         'which is not in the bundle',
+                                  member, location=group['location'])
+
+            for ref in result['refs']:
+                self.summary['references'] += 1
+                is_group = ref['location'].startswith('group[')
+                if not ref['hashes']:
+                    if is_group:
+                        continue
+                    self._error('missing-content-hash', 'External reference has no content_hash',
+                                member, location=ref['location'])
+                    continue
+                file_name = reader.file_name([f"{name}-{digest}" for name, digest in ref['hashes']])
+                if file_name is None:
+                    # Group objects are resolved through vcons/; a copy in files/ is optional
+                    if is_group:
+                        continue
+                    self._error('missing-file', 'Referenced file is not in the bundle', member,
+                                location=ref['location'],
+                                content_hash=[f"{name}-{digest}" for name, digest in ref['hashes']])
+                    continue
+                if ('sha512' in dict(ref['hashes'])
+                        and not file_name.startswith(f"{FILES_DIR}sha512-")):
+                    self._warning('not-sha512-named', 'File SHOULD be named by its sha512 hash',
+                                  file_name, vcon=member, location=ref['location'])
+                for algorithm, digest in ref['hashes']:
+                    expected.setdefault(file_name, []).append(
+                        {'algorithm': algorithm, 'digest': digest, 'vcon': member,
+                         'location': ref['location']})
+
+        for name in reader.file_names.values():
+            if name not in expected:
+                self._warning('unreferenced-file', 'No vCon references this file', name)
+        return expected
+
+    def _check_files(self, reader: BundleReader, executor: ProcessPoolExecutor,
+                     expected: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Stage 3: hash every file and compare with its name and references."""
+        jobs = {}
+        for name in reader.file_names.values():
+            match = FILE_MEMBER.match(name)
+            if not match:
+                continue
+            checks = [{'algorithm': match.group(1), 'digest': match.group(2), 'vcon': None,
+                       'location': 'filename'}] + expected.get(name, [])
+            unsupported = {check['algorithm'] for check in checks} - set(HASH_ALGORITHMS)
+            for algorithm in sorted(unsupported):
+                self._error('unsupported-algorithm', f"Unsupported hash algorithm {algorithm}", name)
+            jobs[name] = [check for check in checks if check['algorithm'] not in unsupported]
+
+        # Largest first, so one big file does not finish the run alone
+        order = sorted(jobs, key=lambda name: reader.members[name][3], reverse=True)
+        futures = [executor.submit(_hash_member, name, sorted({c['algorithm'] for c in jobs[name]}))
+                   for name in order]
+        for future in as_completed(futures):
+            result = future.result()
+            name = result['member']
+            self.summary['files'] += 1
+            self.summary['bytes_hashed'] += result['size']
+            if not result['crc_ok']:
+                self._error('crc-mismatch', 'Member data does not match its ZIP CRC-32', name)
+            for check in jobs[name]:
+                actual = result['digests'][check['algorithm']]
+                if actual == check['digest']:
+                    continue
+                if check['vcon'] is None:
+                    self._error('hash-mismatch', f"Content does not match the {check['algorithm']} "
+                                                 'hash in its filename', name, actual=actual)
+                else:
+                    self._error('hash-mismatch', f"Content does not match the referenced "
+                                                 f"{check['algorithm']} hash", name, vcon=check['vcon'],
+                                location=check['location'], expected=check['digest'], actual=actual)
+
+    def validate(self) -> Dict[str, Any]:
+        """Run the validation stages.
+
+        Returns:
+            Report with 'ok', the last 'stage' run, a 'summary' and the
+            'errors' and 'warnings' found, each with a code, member and
+            message
+        """
+        start = time.monotonic()
+        stage = 'structure'
+        try:
+            reader = BundleReader(self.path)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            self._error('bad-zip', f"Not a readable ZIP archive: {e}")
+            reader = None
+
+        if reader is not None:
+            with reader:
+                self._check_structure(reader)
+                if not self.errors:
+                    with ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                             initargs=(str(self.path),)) as executor:
+                        stage = 'vcons'
+                        expected = self._check_vcons(reader, executor)
+                        if self.verify_hashes and not (self.fail_fast and self.errors):
+                            stage = 'files'
+                            self._check_files(reader, executor, expected)
+
+        return {'bundle': str(self.path), 'ok': not self.errors, 'stage': stage,
+                'summary': dict(self.summary, errors=len(self.errors), warnings=len(self.warnings),
+                                seconds=round(time.monotonic() - start, 3)),
+                'errors': self.errors, 'warnings': self.warnings}
+
+
+def create_bundle(args: argparse.Namespace) -> int:
+    """Build a bundle from the command line arguments."""
+    verifier = MediaVerifier(jobs=args.jobs, per_host=args.per_host,
+                             base_url=args.base_url, timeout=args.timeout)
+    builder = BundleBuilder(verifier, jobs=args.jobs)
+    for path in args.files:
+        builder.add_vcon(path)
+
+    report = builder.build(args.output, keep_going=args.keep_going)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0 if report['ok'] else 1
+
+    for warning in report['warnings']:
+        location = f" {warning['location']}" if 'location' in warning else ''
+        print(f"⚠️  {warning.get('vcon') or warning['file']}{location}: {warning['warning']}")
+    for error in report['errors']:
+        print(f"❌ {error.get('vcon') or error.get('file')}: {error['error']}")
+
+    if not report['ok']:
+        print("\n❌ Bundle not written")
+        return 1
+
+    size = args.output.stat().st_size
+    print(f"\n✅ Wrote {args.output}: {report['vcons']} vCons, {report['files']} files "
+          f"({report['references']} references, {report['bytes'] / 1024 / 1024:.1f} MB of media), "
+          f"{size / 1024 / 1024:.1f} MB in {report['seconds']:.1f}s")
+    return 0
+
+
+def list_bundle(args: argparse.Namespace) -> int:
+    """List a bundle's vCons and files."""
+    with BundleReader(args.bundle, cache_index=not args.no_index) as reader:
+        if args.json:
+            print(json.dumps({'manifest': reader.manifest(), 'vcons': reader.uuids(),
+                              'files': sorted(reader.file_names.values())}, indent=2))
+            return 0
+        manifest = reader.manifest()
+        print(f"📦 {args.bundle}: {manifest.get('format')} {manifest.get('version')}")
+        for uuid in reader.uuids():
+            print(f"  {reader.vcon_names[uuid]}  {reader.members[reader.vcon_names[uuid]][3]} bytes")
+        for name in sorted(reader.file_names.values()):
+            print(f"  {name}  {reader.members[name][3]} bytes")
+    return 0
+
+
+def cat_member(args: argparse.Namespace) -> int:
+    """Write a vCon, file or member of a bundle to stdout."""
+    with BundleReader(args.bundle, cache_index=not args.no_index) as reader:
+        name = (reader.vcon_names.get(args.member) or reader.file_name(args.member)
+                or (args.member if args.member in reader.members else None))
+        if name is None:
+            print(f"Error: {args.member} is not in {args.bundle}", file=sys.stderr)
+            return 1
+        for chunk in reader.iter_chunks(name):
+            sys.stdout.buffer.write(chunk)
+            if isinstance(chunk, memoryview):
+                chunk.release()
+    return 0
+
+
+def validate_bundle(args: argparse.Namespace) -> int:
+    """Validate a bundle and report the result."""
+    validator = BundleValidator(args.bundle, jobs=args.jobs, verify_hashes=not args.no_hashes,
+                                fail_fast=args.fail_fast)
+    report = validator.validate()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0 if report['ok'] else 1
+
+    for warning in report['warnings']:
+        location = f" {warning['location']}" if 'location' in warning else ''
+        print(f"⚠️  [{warning['code']}] {warning['member'] or args.bundle}{location}: {warning['message']}")
+    for error in report['errors']:
+        location = f" {error['location']}" if 'location' in error else ''
+        vcon = f" (in {error['vcon']})" if error.get('vcon') else ''
+        print(f"❌ [{error['code']}] {error['member'] or args.bundle}{location}{vcon}: {error['message']}")
+
+    summary = report['summary']
+    status = '✅ Valid' if report['ok'] else f"❌ Invalid (stopped after {report['stage']})"
+    print(f"\n{status}: {summary['vcons']} vCons, {summary['files']} files hashed "
+          f"({summary['bytes_hashed'] / 1024 / 1024:.1f} MB), {summary['references']} references, "
+          f"{summary['errors']} errors, {summary['warnings']} warnings in {summary['seconds']:.1f}s")
+    return 0 if report['ok'] else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser."""
+    parser = argparse.ArgumentParser(description='vCon Zip Bundle (.vconz) tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    create = subparsers.add_parser('create', help='Bundle vCons and their referenced files')
+    create.add_argument('files', nargs='+', type=Path, help='vCon files to bundle')
+    create.add_argument('-o', '--output', type=Path, required=True, help='Output .vconz file')
+    create.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 4,
+                        help='Files fetched and hashed concurrently (default: CPU count)')
+    create.add_argument('--per-host', type=int, default=4,
+                        help='Maximum concurrent downloads per host (default: 4)')
+    create.add_argument('--base-url', default=os.getenv('VCON_MEDIA_BASE_URL'),
+                        help='Fetch media from this base URL instead, keeping each URL path; '
+                             'without it only https:// URLs are followed (default: $VCON_MEDIA_BASE_URL)')
+    create.add_argument('--timeout', type=float, default=60,
+                        help='Per-request timeout in seconds (default: 60)')
+    create.add_argument('--keep-going', action='store_true',
+                        help='Write the bundle even if some vCons or files cannot be added')
+    create.add_argument('--json', action='store_true', help='Print the build report as JSON')
+    create.set_defaults(func=create_bundle)
+
+    ls = subparsers.add_parser('ls', help="List a bundle's vCons and files")
+    ls.add_argument('bundle', type=Path, help='Bundle to read')
+    ls.add_argument('--no-index', action='store_true', help='Do not read or write the sidecar index')
+    ls.add_argument('--json', action='store_true', help='Print the listing as JSON')
+    ls.set_defaults(func=list_bundle)
+
+    cat = subparsers.add_parser('cat', help='Write a vCon or file from a bundle to stdout')
+    cat.add_argument('bundle', type=Path, help='Bundle to read')
+    cat.add_argument('member', help='vCon UUID, content hash, or archive path')
+    cat.add_argument('--no-index', action='store_true', help='Do not read or write the sidecar index')
+    cat.set_defaults(func=cat_member)
+
+    validate = subparsers.add_parser('validate', help='Check a bundle against the vconz.md validation rules')
+    validate.add_argument('bundle', type=Path, help='Bundle to validate')
+    validate.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 4,
+                          help='Worker processes (default: CPU count)')
+    validate.add_argument('--no-hashes', action='store_true',
+                          help='Check structure and references only, without hashing files')
+    validate.add_argument('--fail-fast', action='store_true',
+                          help='Stop after the first stage that finds errors')
+    validate.add_argument('--json', action='store_true', help='Print the report as JSON')
+    validate.set_defaults(func=validate_bundle)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
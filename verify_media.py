@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+vCon External Media Verifier
+
+Checks that the media referenced by vCon dialog, attachment, analysis and
+group entries through `url` plus `content_hash` matches its hash.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, BinaryIO
+from urllib.parse import urlparse, urlunparse
+from urllib.request import url2pathname
+
+# Third-party modules, imported on first use by _import_dependencies()
+requests = None
+
+
+def _import_dependencies() -> None:
+    """Import the third-party dependencies."""
+    global requests
+    if requests is not None:
+        return
+
+    try:
+        import requests
+    except ImportError:
+        print("Error: requests library not found. Install with: pip install requests")
+        sys.exit(1)
+
+
+# content_hash algorithm names mapped to hashlib names
+HASH_ALGORITHMS = {
+    'sha512': 'sha512',
+    'sha384': 'sha384',
+    'sha256': 'sha256',
+}
+
+# vCon sections whose entries may reference external content
+MEDIA_SECTIONS = ('dialog', 'attachments', 'analysis', 'group')
+
+
+def b64url(digest: bytes) -> str:
+    """Encode a digest as unpadded base64url, as used by content_hash."""
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+
+def parse_content_hash(value: Any) -> List[Tuple[str, str]]:
+    """Split a content_hash value into (algorithm, base64url digest) pairs.
+
+    Args:
+        value: A "alg-digest" string or a list of them
+
+    Returns:
+        Pairs in the order given; malformed entries are skipped
+    """
+    hashes = []
+    for item in value if isinstance(value, list) else [value]:
+        if isinstance(item, str) and '-' in item:
+            algorithm, digest = item.split('-', 1)
+            hashes.append((algorithm.lower(), digest.rstrip('=')))
+    return hashes
+
+
+def primary_hash(hashes: List[Tuple[str, str]]) -> Tuple[str, str]:
+    """Pick the hash that identifies the content: SHA-512 if present, else the first."""
+    for algorithm, digest in hashes:
+        if algorithm == 'sha512':
+            return algorithm, digest
+    return hashes[0]
+
+
+def _entry_hashes(entry: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Content hashes of an entry, including the pre-0.0.2 alg/signature form."""
+    hashes = parse_content_hash(entry.get('content_hash'))
+    if not hashes and entry.get('alg') and entry.get('signature'):
+        algorithm = entry['alg'].lower().replace('-', '')
+        # Legacy signatures are standard base64; normalize to base64url
+        digest = entry['signature'].replace('+', '-').replace('/', '_').rstrip('=')
+        hashes.append((algorithm, digest))
+    return hashes
+
+
+def load_vcon(path: Path) -> Optional[Dict[str, Any]]:
+    """Load a vCon, unwrapping a signed (JWS) form.
+
+    Returns:
+        The vCon object, or None if it is encrypted and cannot be read
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file, or its JWS payload, is not a JSON object
+    """
+    with open(path, 'rb') as f:
+        doc = json.load(f)
+    if not isinstance(doc, dict):
+        raise ValueError('vCon is not a JSON object')
+    if 'ciphertext' in doc:
+        return None
+    if 'payload' in doc and 'signatures' in doc:
+        payload = doc['payload']
+        doc = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        if not isinstance(doc, dict):
+            raise ValueError('JWS payload is not a JSON object')
+    return doc
+
+
+def external_refs(vcon: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Find the entries of a vCon that reference external content.
+
+    Args:
+        vcon: Parsed (unsigned) vCon
+
+    Returns:
+        One dict per reference with its location ('dialog[0]'), url,
+        hashes and mediatype
+    """
+    refs = []
+    for section in MEDIA_SECTIONS:
+        entries = vcon.get(section)
+        if not isinstance(entries, list):
+            continue
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict) or not entry.get('url'):
+                continue
+            refs.append({
+                'location': f"{section}[{index}]",
+                'url': entry['url'],
+                'hashes': _entry_hashes(entry),
+                'mediatype': entry.get('mediatype') or entry.get('mimetype'),
+            })
+    return refs
+
+
+class MediaCache:
+    """On-disk record of media that has already been hashed.
+
+    Digests are stored per URL together with the ETag they were computed
+    for, so a later run can confirm them with a conditional request.
+    Verified content hashes are stored with the URLs they were verified
+    against, so a hash confirmed at one URL says nothing about another.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize the cache.
+
+        Args:
+            path: JSON file holding the cache
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.urls: Dict[str, Dict[str, Any]] = data.get('urls', {})
+        self.hashes: Dict[str, Dict[str, int]] = {
+            content_hash: urls for content_hash, urls in data.get('hashes', {}).items()
+            if isinstance(urls, dict) and 'url' not in urls
+        }
+
+    @staticmethod
+    def default_path() -> Path:
+        """Return the default cache file."""
+        base = os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache'
+        return Path(base) / 'vcon-media' / 'cache.json'
+
+    def url_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached ETag and digests for a URL, if any."""
+        with self._lock:
+            return self.urls.get(url)
+
+    def put_url(self, url: str, etag: Optional[str], digests: Dict[str, str]) -> None:
+        """Remember the digests of a URL's content and its ETag."""
+        with self._lock:
+            self.urls[url] = {'etag': etag, 'digests': digests}
+
+    def verified(self, content_hash: str, url: str) -> Optional[int]:
+        """Return when a content hash was verified against a URL, if it was."""
+        with self._lock:
+            return self.hashes.get(content_hash, {}).get(url)
+
+    def put_verified(self, content_hash: str, url: str) -> None:
+        """Record that a content hash was verified against a URL."""
+        with self._lock:
+            self.hashes.setdefault(content_hash, {})[url] = int(time.time())
+
+    def save(self) -> None:
+        """Write the cache atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with self._lock:
+            data = {'urls': self.urls, 'hashes': self.hashes}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class MediaVerifier:
+    """Concurrent, streaming content_hash verifier.
+
+    Each distinct URL is fetched once, in chunks fed straight
+    into the hash functions, so bodies are never held in memory. Fetches
+    run on a thread pool with a cap on concurrent connections per host.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, cache: Optional[MediaCache] = None, jobs: int = 16,
+                 per_host: int = 4, base_url: Optional[str] = None,
+                 timeout: float = 60, revalidate: bool = False):
+        """Initialize the verifier.
+
+        Args:
+            cache: Optional cache of previous results
+            jobs: Maximum concurrent fetches overall
+            per_host: Maximum concurrent fetches per host
+            base_url: Replace the scheme and host of every media URL with
+                this base, keeping the path (e.g. a local test server)
+            timeout: Per-request timeout in seconds
+            revalidate: Confirm cached results with conditional requests
+                instead of trusting verified hashes outright
+        """
+        _import_dependencies()
+        self.cache = cache
+        self.jobs = jobs
+        self.per_host = per_host
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.timeout = timeout
+        self.revalidate = revalidate
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=per_host)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._hosts: Dict[str, threading.Semaphore] = {}
+        self._hosts_lock = threading.Lock()
+
+    def resolve_url(self, url: str) -> str:
+        """Apply the base URL override to a media URL."""
+        if not self.base_url:
+            return url
+        parsed = urlparse(url)
+        path = urlunparse(('', '', parsed.path, parsed.params, parsed.query, ''))
+        return f"{self.base_url}{path}"
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        """Return the semaphore limiting connections to a URL's host."""
+        host = urlparse(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                self._hosts[host] = threading.Semaphore(self.per_host)
+            return self._hosts[host]
+
+    def fetch_digests(self, url: str, algorithms: List[str],
+                      sink: Optional[BinaryIO] = None) -> Dict[str, Any]:
+        """Stream a URL through the given hash algorithms.
+
+        A cached ETag is sent as If-None-Match, and a 304 reuses the
+        cached digests without downloading the body. With a sink, the
+        body is always downloaded and written to it in the same pass.
+
+        Args:
+            url: Media URL (after the base URL override)
+            algorithms: content_hash algorithm names to compute
+            sink: Optional binary file receiving the body
+
+        Returns:
+            Dict with 'digests' (algorithm -> base64url), 'cached' and
+            'received' bytes
+
+        Raises:
+            requests.RequestException: On request failure
+            OSError: On a file:// read failure
+        """
+        entry = self.cache.url_entry(url) if self.cache is not None and sink is None else None
+        if entry and not set(algorithms) <= set(entry['digests']):
+            entry = None
+
+        hashers = {name: hashlib.new(HASH_ALGORITHMS[name]) for name in algorithms}
+        received = 0
+
+        if url.startswith('file://'):
+            with open(url2pathname(urlparse(url).path), 'rb') as f:
+                for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                    if sink is not None:
+                        sink.write(chunk)
+                    received += len(chunk)
+            return {'digests': {name: b64url(h.digest()) for name, h in hashers.items()},
+                    'cached': False, 'received': received}
+
+        headers = {'If-None-Match': entry['etag']} if entry and entry.get('etag') else {}
+        with self._host_slot(url):
+            with self.session.get(url, headers=headers, stream=True,
+                                  timeout=self.timeout) as response:
+                if response.status_code == 304:
+                    return {'digests': entry['digests'], 'cached': True, 'received': 0}
+                response.raise_for_status()
+                for chunk in response.iter_content(self.CHUNK_SIZE):
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                    if sink is not None:
+                        sink.write(chunk)
+                    received += len(chunk)
+                etag = response.headers.get('ETag')
+
+        digests = {name: b64url(h.digest()) for name, h in hashers.items()}
+        if self.cache is not None:
+            self.cache.put_url(url, etag, digests)
+        return {'digests': digests, 'cached': False, 'received': received}
+
+    def _verify_url(self, url: str, refs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Verify every reference served from one URL with a single fetch.
+
+        The body is hashed with every algorithm any of the references
+        names, and each reference is then checked against its own hashes.
+
+        Returns:
+            One outcome per reference, in order
+        """
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(refs)
+        pending = []
+        for index, ref in enumerate(refs):
+            unsupported = [name for name, _ in ref['hashes'] if name not in HASH_ALGORITHMS]
+            if unsupported:
+                outcomes[index] = {'status': 'unsupported',
+                                   'message': f"Unsupported hash algorithm: {', '.join(unsupported)}"}
+            elif (self.cache is not None and not self.revalidate
+                  and all(self.cache.verified(f"{name}-{digest}", url)
+                          for name, digest in ref['hashes'])):
+                outcomes[index] = {'status': 'cached', 'fetched_url': url,
+                                   'message': 'Verified earlier from this URL'}
+            else:
+                pending.append(index)
+        if not pending:
+            return outcomes
+
+        algorithms = sorted({name for index in pending for name, _ in refs[index]['hashes']})
+        try:
+            fetched = self.fetch_digests(url, algorithms)
+        except (requests.RequestException, OSError) as e:
+            for index in pending:
+                outcomes[index] = {'status': 'error', 'fetched_url': url, 'message': str(e)}
+            return outcomes
+
+        read = 'unchanged since cached' if fetched['cached'] else f"{fetched['received']} bytes read"
+        for index in pending:
+            hashes = refs[index]['hashes']
+            mismatched = [name for name, digest in hashes if fetched['digests'][name] != digest]
+            if mismatched:
+                outcomes[index] = {'status': 'mismatch', 'fetched_url': url,
+                                   'message': f"{', '.join(mismatched)} does not match ({read})"}
+                continue
+            if self.cache is not None:
+                for name, digest in hashes:
+                    self.cache.put_verified(f"{name}-{digest}", url)
+            outcomes[index] = {'status': 'ok', 'fetched_url': url, 'received': fetched['received'],
+                               'message': 'Not modified since last verified' if fetched['cached']
+                                          else f"{fetched['received']} bytes hashed"}
+        return outcomes
+
+    def verify(self, refs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Verify references, fetching each distinct URL once.
+
+        References that share a URL (after the base URL override) share
+        one fetch, but each is checked against its own content_hash and
+        gets its own outcome. Without a base URL, only https:// URLs are
+        fetched; any other scheme is reported as an error.
+
+        Args:
+            refs: References from external_refs(), optionally with a 'file' key
+
+        Returns:
+            The references in order, each extended with 'status' (ok,
+            cached, mismatch, error, unsupported or missing-hash) and
+            'message'
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(refs)
+        groups: Dict[str, List[int]] = {}
+        for index, ref in enumerate(refs):
+            if not ref['hashes']:
+                results[index] = dict(ref, status='missing-hash', message='No content_hash')
+                continue
+            # URLs come from untrusted vCon content, so only HTTPS is
+            # followed unless the operator maps them with --base-url
+            if not self.base_url and urlparse(ref['url']).scheme != 'https':
+                results[index] = dict(ref, status='error',
+                                      message=f"Not an HTTPS URL: {ref['url']}")
+                continue
+            groups.setdefault(self.resolve_url(ref['url']), []).append(index)
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = {url: executor.submit(self._verify_url, url, [refs[i] for i in indices])
+                       for url, indices in groups.items()}
+            for url, indices in groups.items():
+                for index, outcome in zip(indices, futures[url].result()):
+                    results[index] = dict(refs[index], **outcome)
+        return results
+
+STATUS_ICONS = {
+    'ok': '✅',
+    'cached': '✅',
+    'mismatch': '❌',
+    'error': '❌',
+    'unsupported': '⚠️',
+    'missing-hash': '⚠️',
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Verify vCon external media against content_hash')
+    parser.add_argument('files', nargs='+', type=Path, help='vCon files to check')
+    parser.add_argument('-j', '--jobs', type=int, default=16,
+                        help='Maximum concurrent fetches (default: 16)')
+    parser.add_argument('--per-host', type=int, default=4,
+                        help='Maximum concurrent fetches per host (default: 4)')
+    parser.add_argument('--base-url', default=os.getenv('VCON_MEDIA_BASE_URL'),
+                        help='Fetch media from this base URL instead, keeping each URL path; '
+                             'without it only https:// URLs are followed '
+                             '(default: $VCON_MEDIA_BASE_URL)')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='Per-request timeout in seconds (default: 60)')
+    parser.add_argument('--cache', type=Path, default=MediaCache.default_path(),
+                        help=f'Cache file (default: {MediaCache.default_path()})')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the cache')
+    parser.add_argument('--revalidate', action='store_true',
+                        help='Re-check cached media with conditional requests')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    refs = []
+    for path in args.files:
+        try:
+            vcon = load_vcon(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Skipping {path}: {e}", file=sys.stderr)
+            continue
+        if vcon is None:
+            print(f"⚠️  Skipping {path}: encrypted", file=sys.stderr)
+            continue
+        refs.extend(dict(ref, file=str(path)) for ref in external_refs(vcon))
+
+    cache = None if args.no_cache else MediaCache(args.cache)
+    verifier = MediaVerifier(cache=cache, jobs=args.jobs, per_host=args.per_host,
+                             base_url=args.base_url, timeout=args.timeout,
+                             revalidate=args.revalidate)
+    results = verifier.verify(refs)
+    if cache is not None:
+        cache.save()
+
+    failed = [r for r in results if r['status'] in ('mismatch', 'error')]
+    if args.json:
+        for result in results:
+            result['hashes'] = [f"{name}-{digest}" for name, digest in result['hashes']]
+        print(json.dumps(results, indent=2))
+    else:
+        for result in sorted(results, key=lambda r: (r['file'], r['location'])):
+            print(f"{STATUS_ICONS[result['status']]} {result['file']} {result['location']}: "
+                  f"{result['message']}")
+        print(f"\n{len(results) - len(failed)}/{len(results)} references verified")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())